@@ -0,0 +1,30 @@
+"""Add content_hash to media_files
+
+Revision ID: 5c1f0e9a7d42
+Revises: 1238e9f25ec0
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e9a7d42'
+down_revision: Union[str, Sequence[str], None] = '1238e9f25ec0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('media_files', sa.Column('content_hash', sa.String(), nullable=True))
+    op.create_index(op.f('ix_media_files_content_hash'), 'media_files', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_files_content_hash'), table_name='media_files')
+    op.drop_column('media_files', 'content_hash')
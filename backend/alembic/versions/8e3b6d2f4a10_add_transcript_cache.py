@@ -0,0 +1,47 @@
+"""Add transcript_cache table
+
+Revision ID: 8e3b6d2f4a10
+Revises: 5c1f0e9a7d42
+Create Date: 2026-10-18 10:04:17.228904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b6d2f4a10'
+down_revision: Union[str, Sequence[str], None] = '5c1f0e9a7d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'transcript_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(), nullable=False),
+        sa.Column('model_key', sa.String(), nullable=False),
+        sa.Column('config_key', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('segments', sa.Text(), nullable=True),
+        sa.Column('language_code', sa.String(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transcript_cache_id'), 'transcript_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_transcript_cache_last_used_at'), 'transcript_cache', ['last_used_at'], unique=False)
+    op.create_index('ix_transcript_cache_key', 'transcript_cache', ['content_hash', 'model_key', 'config_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transcript_cache_key', table_name='transcript_cache')
+    op.drop_index(op.f('ix_transcript_cache_last_used_at'), table_name='transcript_cache')
+    op.drop_index(op.f('ix_transcript_cache_id'), table_name='transcript_cache')
+    op.drop_table('transcript_cache')
@@ -0,0 +1,28 @@
+"""Add vad_skipped_fraction to transcripts
+
+Revision ID: a6c2e4d8f1b3
+Revises: f3a9c5e1b2d8
+Create Date: 2026-10-18 16:42:08.193527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c2e4d8f1b3'
+down_revision: Union[str, Sequence[str], None] = 'f3a9c5e1b2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transcripts', sa.Column('vad_skipped_fraction', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transcripts', 'vad_skipped_fraction')
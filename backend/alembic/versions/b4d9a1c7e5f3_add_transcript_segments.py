@@ -0,0 +1,42 @@
+"""Add transcript_segments table
+
+Revision ID: b4d9a1c7e5f3
+Revises: 8e3b6d2f4a10
+Create Date: 2026-10-18 13:21:45.610382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d9a1c7e5f3'
+down_revision: Union[str, Sequence[str], None] = '8e3b6d2f4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'transcript_segments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('transcript_id', sa.Integer(), nullable=False),
+        sa.Column('start', sa.Float(), nullable=False),
+        sa.Column('end', sa.Float(), nullable=False),
+        sa.Column('text', sa.String(), nullable=True),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['transcript_id'], ['transcripts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transcript_segments_transcript_start', 'transcript_segments', ['transcript_id', 'start'], unique=False)
+    op.add_column('transcripts', sa.Column('max_segment_duration', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transcripts', 'max_segment_duration')
+    op.drop_index('ix_transcript_segments_transcript_start', table_name='transcript_segments')
+    op.drop_table('transcript_segments')
@@ -0,0 +1,39 @@
+"""Add foreign keys and lookup indexes for media history and transcripts
+
+Revision ID: d7e2f8a3b6c1
+Revises: b4d9a1c7e5f3
+Create Date: 2026-10-18 14:02:33.871250
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2f8a3b6c1'
+down_revision: Union[str, Sequence[str], None] = 'b4d9a1c7e5f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite cannot add constraints in place; batch mode rebuilds the table
+    with op.batch_alter_table('media_files') as batch_op:
+        batch_op.create_foreign_key('fk_media_files_user_id_users', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_media_files_user_created', ['user_id', 'created_at', 'id'], unique=False)
+    with op.batch_alter_table('transcripts') as batch_op:
+        batch_op.create_foreign_key('fk_transcripts_media_file_id_media_files', 'media_files', ['media_file_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index(batch_op.f('ix_transcripts_media_file_id'), ['media_file_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('transcripts') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_transcripts_media_file_id'))
+        batch_op.drop_constraint('fk_transcripts_media_file_id_media_files', type_='foreignkey')
+    with op.batch_alter_table('media_files') as batch_op:
+        batch_op.drop_index('ix_media_files_user_created')
+        batch_op.drop_constraint('fk_media_files_user_id_users', type_='foreignkey')
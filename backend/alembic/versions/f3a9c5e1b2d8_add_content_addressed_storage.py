@@ -0,0 +1,37 @@
+"""Add content-addressed storage blobs
+
+Revision ID: f3a9c5e1b2d8
+Revises: d7e2f8a3b6c1
+Create Date: 2026-10-18 14:37:12.518377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c5e1b2d8'
+down_revision: Union[str, Sequence[str], None] = 'd7e2f8a3b6c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'storage_blobs',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.add_column('media_files', sa.Column('storage_key', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('media_files', 'storage_key')
+    op.drop_table('storage_blobs')
@@ -12,6 +12,128 @@ class Settings:
     SECRET_KEY = os.getenv("SECRET_KEY", "secret-key-for-development")
     ALGORITHM = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    # Verified token -> user cache; 0 disables it. The TTL also bounds how long
+    # other processes keep serving a user deactivated through this one
+    AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+    # Database access. DB_ASYNC serves request handlers from an async engine
+    # (aiosqlite / asyncpg, derived from DATABASE_URL unless
+    # DATABASE_ASYNC_URL is set); workers and jobs always use the sync engine.
+    # Keep DB_POOL_SIZE >= IO_CONCURRENCY so executor threads never queue
+    # for a connection
+    DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+    DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL", "")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # ASR model and inference backend: eager, quantized (dynamic int8) or onnx
+    ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "facebook/wav2vec2-large-xlsr-53")
+    ASR_MODEL_REVISION = os.getenv("ASR_MODEL_REVISION", "main")
+    ASR_BACKEND = os.getenv("ASR_BACKEND", "eager")
+    ASR_ONNX_DIR = os.getenv("ASR_ONNX_DIR", "model_cache/onnx")
+
+    # ASR windowed inference (seconds)
+    ASR_CHUNK_LENGTH_S = float(os.getenv("ASR_CHUNK_LENGTH_S", 20))
+    ASR_CHUNK_STRIDE_S = float(os.getenv("ASR_CHUNK_STRIDE_S", 2))
+
+    # CTC decoding: "greedy" (argmax) or "beam" (prefix beam search, with
+    # an optional ARPA n-gram LM weighted by ALPHA plus BETA per word)
+    ASR_DECODER = os.getenv("ASR_DECODER", "greedy")
+    ASR_BEAM_WIDTH = int(os.getenv("ASR_BEAM_WIDTH", 16))
+    ASR_BEAM_TOKEN_MIN_LOGP = float(os.getenv("ASR_BEAM_TOKEN_MIN_LOGP", -5))
+    ASR_BEAM_BLANK_SKIP_PROB = float(os.getenv("ASR_BEAM_BLANK_SKIP_PROB", 0.999))
+    ASR_BEAM_PRUNE_LOGP = float(os.getenv("ASR_BEAM_PRUNE_LOGP", -10))
+    ASR_LM_PATH = os.getenv("ASR_LM_PATH", "")
+    ASR_LM_ALPHA = float(os.getenv("ASR_LM_ALPHA", 0.5))
+    ASR_LM_BETA = float(os.getenv("ASR_LM_BETA", 1.0))
+
+    # Optional voice-activity detection: only speech regions reach the model
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+    VAD_ENERGY_THRESHOLD_DB = float(os.getenv("VAD_ENERGY_THRESHOLD_DB", -40))  # relative to peak
+    VAD_FLATNESS_THRESHOLD = float(os.getenv("VAD_FLATNESS_THRESHOLD", 0.5))
+    VAD_MIN_SPEECH_MS = float(os.getenv("VAD_MIN_SPEECH_MS", 120))
+    VAD_MIN_SILENCE_MS = float(os.getenv("VAD_MIN_SILENCE_MS", 300))
+    VAD_PADDING_MS = float(os.getenv("VAD_PADDING_MS", 200))
+
+    # Cross-request micro-batching of forward passes. Windows from concurrent
+    # transcriptions only meet in one batch if INFERENCE_CONCURRENCY > 1 or
+    # they belong to the same batch job
+    ASR_BATCHING = os.getenv("ASR_BATCHING", "true").lower() == "true"
+    ASR_BATCH_MAX_SIZE = int(os.getenv("ASR_BATCH_MAX_SIZE", 8))
+    ASR_BATCH_MAX_WAIT_MS = float(os.getenv("ASR_BATCH_MAX_WAIT_MS", 10))
+
+    # Live WebSocket transcription (seconds)
+    STREAM_STEP_S = float(os.getenv("STREAM_STEP_S", 0.5))
+    STREAM_COMMIT_S = float(os.getenv("STREAM_COMMIT_S", 4))
+    STREAM_MAX_BUFFER_S = float(os.getenv("STREAM_MAX_BUFFER_S", 8))
+    STREAM_LEFT_CONTEXT_S = float(os.getenv("STREAM_LEFT_CONTEXT_S", 1))
+    STREAM_STABILITY_MARGIN_S = float(os.getenv("STREAM_STABILITY_MARGIN_S", 1))
+
+    # POST /transcribe/batch: each request is one job on the batch queue
+    # (BATCH_CONCURRENCY running, BATCH_QUEUE_SIZE waiting). A running job
+    # transcribes BATCH_TRANSCRIBE_FILE_CONCURRENCY files at once so their
+    # windows fill the micro-batches
+    BATCH_TRANSCRIBE_MAX_ITEMS = int(os.getenv("BATCH_TRANSCRIBE_MAX_ITEMS", 500))
+    BATCH_TRANSCRIBE_FILE_CONCURRENCY = int(os.getenv("BATCH_TRANSCRIBE_FILE_CONCURRENCY", 8))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 1))
+    BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", 16))
+
+    # Subtitle cue grouping
+    SUBTITLE_MAX_CHARS = int(os.getenv("SUBTITLE_MAX_CHARS", 42))
+    SUBTITLE_MAX_DURATION_S = float(os.getenv("SUBTITLE_MAX_DURATION_S", 6))
+    SUBTITLE_MAX_GAP_S = float(os.getenv("SUBTITLE_MAX_GAP_S", 1))
+
+    # Multi-process serving: >0 forks that many workers after loading the
+    # model once; set INFERENCE_CONCURRENCY to at least the same number.
+    # ASR_WORKER_THREADS=0 splits the cores evenly between workers
+    ASR_WORKER_PROCESSES = int(os.getenv("ASR_WORKER_PROCESSES", 0))
+    ASR_WORKER_THREADS = int(os.getenv("ASR_WORKER_THREADS", 0))
+
+    # Transcription jobs: "local" runs an in-process worker pool with an
+    # in-memory job store, "celery" dispatches to Celery workers via Redis
+    JOB_BACKEND = os.getenv("JOB_BACKEND", "local")
+    JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", 24 * 60 * 60))
+
+    # Transcript cache keyed by (audio hash, model, decoding config)
+    TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+    TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", 10000))
+
+    # Uploaded media: "local" keeps content-addressed blobs under STORAGE_DIR,
+    # "s3" in an S3-compatible bucket with a local read cache
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    STORAGE_DIR = os.getenv("STORAGE_DIR", "uploads")
+    STORAGE_S3_BUCKET = os.getenv("STORAGE_S3_BUCKET", "")
+    STORAGE_S3_PREFIX = os.getenv("STORAGE_S3_PREFIX", "media/")
+    STORAGE_S3_ENDPOINT_URL = os.getenv("STORAGE_S3_ENDPOINT_URL", "")
+    STORAGE_CACHE_DIR = os.getenv("STORAGE_CACHE_DIR", "storage_cache")
+    STORAGE_CACHE_MAX_BYTES = int(os.getenv("STORAGE_CACHE_MAX_BYTES", 20 * 1024 ** 3))
+
+    # Decoded 16 kHz audio kept per media file for re-transcription and range reads
+    AUDIO_CACHE_ENABLED = os.getenv("AUDIO_CACHE_ENABLED", "true").lower() == "true"
+    AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "audio_cache")
+    AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 10 * 1024 ** 3))
+
+    # Profiling: fraction of transcriptions run under cProfile and the torch
+    # profiler (admins can also ask per request); the newest
+    # PROFILE_MAX_RUNS runs are kept under PROFILE_DIR
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_RUNS = int(os.getenv("PROFILE_MAX_RUNS", 50))
+
+    # Bounded executors for blocking work; requests beyond
+    # concurrency + queue size are rejected with 503 and Retry-After
+    INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", 2))
+    INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", 8))
+    # Live streams get their own lane so file transcriptions can't delay partials
+    STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", 4))
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 8))
+    IO_CONCURRENCY = int(os.getenv("IO_CONCURRENCY", 16))
+    IO_QUEUE_SIZE = int(os.getenv("IO_QUEUE_SIZE", 256))
+    EXECUTOR_RETRY_AFTER_SECONDS = int(os.getenv("EXECUTOR_RETRY_AFTER_SECONDS", 10))
+
 settings = Settings()
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple, Union
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models import MediaFile
 from app.schemas.media import MediaFileCreate, MediaFileUpdate
@@ -5,15 +8,29 @@ from app.schemas.media import MediaFileCreate, MediaFileUpdate
 def get_media_file(db: Session, media_file_id: int):
     return db.query(MediaFile).filter(MediaFile.id == media_file_id).first()
 
-def get_user_media_files(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(MediaFile).filter(MediaFile.user_id == user_id).offset(skip).limit(limit).all()
+def get_media_files(db: Session, media_file_ids: Sequence[int]) -> List[MediaFile]:
+    return db.query(MediaFile).filter(MediaFile.id.in_(media_file_ids)).all()
+
+def get_user_media_files(db: Session, user_id: int, limit: int = 100,
+                         after: Optional[Tuple[datetime, int]] = None):
+    """
+    A user's media files, newest first, strictly after the (created_at, id)
+    keyset position `after`. Seeks straight into ix_media_files_user_created,
+    so every page costs the same however deep it is.
+    """
+    query = db.query(MediaFile).filter(MediaFile.user_id == user_id)
+    if after is not None:
+        query = query.filter(tuple_(MediaFile.created_at, MediaFile.id) < tuple_(*after))
+    return query.order_by(MediaFile.created_at.desc(), MediaFile.id.desc()).limit(limit).all()
 
 def create_media_file(db: Session, media_file: MediaFileCreate, user_id: int):
     db_media_file = MediaFile(
         user_id=user_id,
         filename=media_file.filename,
-        file_path="",  # Will be updated after upload
+        file_path=media_file.file_path,
         file_size=media_file.file_size,
+        content_hash=media_file.content_hash,
+        storage_key=media_file.storage_key,
         mime_type=media_file.mime_type,
         status="uploaded"
     )
@@ -22,15 +39,27 @@ def create_media_file(db: Session, media_file: MediaFileCreate, user_id: int):
     db.refresh(db_media_file)
     return db_media_file
 
-def update_media_file(db: Session, media_file_id: int, media_file_update: MediaFileUpdate):
+def update_media_file(db: Session, media_file_id: int, media_file_update: Union[MediaFileUpdate, dict]):
     db_media_file = db.query(MediaFile).filter(MediaFile.id == media_file_id).first()
     if db_media_file:
-        for key, value in media_file_update.dict(exclude_unset=True).items():
+        if isinstance(media_file_update, dict):
+            update_data = media_file_update
+        else:
+            update_data = media_file_update.dict(exclude_unset=True)
+        for key, value in update_data.items():
             setattr(db_media_file, key, value)
         db.commit()
         db.refresh(db_media_file)
     return db_media_file
 
+def update_media_status(db: Session, media_file_ids: Sequence[int], status: str) -> int:
+    """Set the status of many media files in one statement"""
+    updated = db.query(MediaFile).filter(MediaFile.id.in_(media_file_ids)).update(
+        {"status": status}, synchronize_session=False
+    )
+    db.commit()
+    return updated
+
 def delete_media_file(db: Session, media_file_id: int):
     db_media_file = db.query(MediaFile).filter(MediaFile.id == media_file_id).first()
     if db_media_file:
@@ -0,0 +1,50 @@
+from typing import List, Dict
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import TranscriptSegment
+
+def bulk_create_segments(db: Session, transcript_id: int, segments: List[Dict]) -> int:
+    """
+    Insert all segments of a transcript in a single executemany round trip.
+    Does not commit, so the caller can write them with their transcript
+    """
+    if not segments:
+        return 0
+    rows = [
+        {
+            "transcript_id": transcript_id,
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+            "confidence": seg.get("confidence"),
+        }
+        for seg in segments
+    ]
+    db.execute(insert(TranscriptSegment), rows)
+    return len(rows)
+
+def get_segment_timings(db: Session, transcript_id: int):
+    """(start, end, text) tuples in time order, without building ORM objects"""
+    return db.query(
+        TranscriptSegment.start, TranscriptSegment.end, TranscriptSegment.text
+    ).filter(
+        TranscriptSegment.transcript_id == transcript_id
+    ).order_by(TranscriptSegment.start).all()
+
+def get_segments_in_range(db: Session, transcript_id: int, start: float, end: float,
+                          max_segment_duration: float = None):
+    """
+    Segments overlapping [start, end), ordered by start time.
+
+    With max_segment_duration the scan of the (transcript_id, start) index is
+    bounded to [start - max_segment_duration, end), so the cost depends on the
+    size of the range rather than on its position in the transcript.
+    """
+    query = db.query(TranscriptSegment).filter(
+        TranscriptSegment.transcript_id == transcript_id,
+        TranscriptSegment.start < end,
+        TranscriptSegment.end > start
+    )
+    if max_segment_duration is not None:
+        query = query.filter(TranscriptSegment.start >= start - max_segment_duration)
+    return query.order_by(TranscriptSegment.start).all()
@@ -0,0 +1,45 @@
+from typing import Callable, Optional
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import StorageBlob
+
+def acquire_blob(db: Session, key: str, size: int) -> int:
+    """Add a reference to a blob, creating its row on first use; returns the new count"""
+    for _ in range(2):
+        updated = db.execute(
+            update(StorageBlob).where(StorageBlob.key == key).values(ref_count=StorageBlob.ref_count + 1)
+        ).rowcount
+        if updated:
+            db.commit()
+            return db.get(StorageBlob, key).ref_count
+        try:
+            db.add(StorageBlob(key=key, size=size, ref_count=1))
+            db.commit()
+            return 1
+        except IntegrityError:
+            # Another upload of the same bytes created the row first
+            db.rollback()
+    raise RuntimeError(f"Could not reference blob {key}")
+
+def release_blob(db: Session, key: str, delete_blob: Optional[Callable[[str], None]] = None) -> bool:
+    """
+    Drop a reference; True when it was the last one. delete_blob(key) runs
+    before the row removal commits, so a concurrent acquire_blob of the same
+    key waits on this transaction and re-creates the blob only after the old
+    bytes are gone. If delete_blob fails the reference is kept.
+    """
+    db.execute(
+        update(StorageBlob).where(StorageBlob.key == key).values(ref_count=StorageBlob.ref_count - 1)
+    )
+    removed = db.execute(
+        delete(StorageBlob).where(StorageBlob.key == key, StorageBlob.ref_count <= 0)
+    ).rowcount
+    if removed and delete_blob is not None:
+        try:
+            delete_blob(key)
+        except BaseException:
+            db.rollback()
+            raise
+    db.commit()
+    return removed > 0
@@ -1,12 +1,28 @@
+from typing import Dict, List
 from sqlalchemy.orm import Session
-from app.models import Transcript
+from app.crud.segment import bulk_create_segments
+from app.models import MediaFile, Transcript
 from app.schemas.transcript import TranscriptCreate, TranscriptUpdate
 
 def get_transcript(db: Session, transcript_id: int):
     return db.query(Transcript).filter(Transcript.id == transcript_id).first()
 
 def get_transcript_by_media_file(db: Session, media_file_id: int):
-    return db.query(Transcript).filter(Transcript.media_file_id == media_file_id).first()
+    # Latest transcript wins when a file has been transcribed more than once
+    return db.query(Transcript).filter(
+        Transcript.media_file_id == media_file_id
+    ).order_by(Transcript.id.desc()).first()
+
+def get_media_file_with_transcript(db: Session, media_file_id: int):
+    """
+    (media file, its latest transcript) in a single query; either may be
+    None. Lets a route check existence and ownership and load the
+    transcript with one round trip
+    """
+    row = db.query(MediaFile, Transcript).outerjoin(
+        Transcript, Transcript.media_file_id == MediaFile.id
+    ).filter(MediaFile.id == media_file_id).order_by(Transcript.id.desc()).first()
+    return tuple(row) if row else (None, None)
 
 def create_transcript(db: Session, transcript: TranscriptCreate):
     db_transcript = Transcript(**transcript.dict())
@@ -15,6 +31,24 @@ def create_transcript(db: Session, transcript: TranscriptCreate):
     db.refresh(db_transcript)
     return db_transcript
 
+def create_transcript_with_segments(db: Session, transcript: TranscriptCreate, segments: List[Dict]):
+    """
+    Write a transcript and its segments in one transaction, so no reader
+    ever sees a transcript whose segments are missing
+    """
+    db_transcript = Transcript(**transcript.dict())
+    db.add(db_transcript)
+    try:
+        # Flush to get the id the segments point at
+        db.flush()
+        bulk_create_segments(db, db_transcript.id, segments)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    db.refresh(db_transcript)
+    return db_transcript
+
 def update_transcript(db: Session, transcript_id: int, transcript_update: TranscriptUpdate):
     db_transcript = db.query(Transcript).filter(Transcript.id == transcript_id).first()
     if db_transcript:
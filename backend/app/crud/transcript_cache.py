@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models import TranscriptCacheEntry
+
+def get_cache_entry(db: Session, content_hash: str, model_key: str, config_key: str):
+    return db.query(TranscriptCacheEntry).filter(
+        TranscriptCacheEntry.content_hash == content_hash,
+        TranscriptCacheEntry.model_key == model_key,
+        TranscriptCacheEntry.config_key == config_key
+    ).first()
+
+def touch_cache_entry(db: Session, entry: TranscriptCacheEntry):
+    entry.last_used_at = datetime.utcnow()
+    entry.hit_count = (entry.hit_count or 0) + 1
+    db.commit()
+    return entry
+
+def create_cache_entry(db: Session, **fields):
+    db_entry = TranscriptCacheEntry(**fields)
+    db.add(db_entry)
+    db.commit()
+    db.refresh(db_entry)
+    return db_entry
+
+def count_cache_entries(db: Session) -> int:
+    return db.query(TranscriptCacheEntry).count()
+
+def delete_least_recently_used(db: Session, count: int) -> int:
+    oldest = db.query(TranscriptCacheEntry.id).order_by(
+        TranscriptCacheEntry.last_used_at.asc()
+    ).limit(count).subquery()
+    deleted = db.query(TranscriptCacheEntry).filter(
+        TranscriptCacheEntry.id.in_(oldest.select())
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def delete_entries_not_for_model(db: Session, model_key: str) -> int:
+    deleted = db.query(TranscriptCacheEntry).filter(
+        TranscriptCacheEntry.model_key != model_key
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
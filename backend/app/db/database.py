@@ -1,13 +1,100 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Union
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.services.executor import io_executor
+
+# A request handler's session: AsyncSession with DB_ASYNC, Session otherwise
+AnySession = Union[Session, AsyncSession]
+
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
+# Request sessions are used from executor threads, so SQLite connections
+# must be allowed to cross threads
+connect_args = {"check_same_thread": False} if is_sqlite else {}
+
+def _pool_options(url: str) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if ":memory:" not in url and not url.endswith("://"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+def _async_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart"""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    scheme, rest = url.split("://", 1)
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg",
+               "postgres": "postgresql+asyncpg", "postgresql+psycopg2": "postgresql+asyncpg"}
+    return f"{drivers.get(scheme, scheme)}://{rest}"
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # SQLite ignores FOREIGN KEY clauses (and ON DELETE CASCADE) unless asked
+    cursor.execute("PRAGMA foreign_keys=ON")
+    # WAL lets readers proceed while a writer holds the lock; writers wait
+    # for each other instead of failing with "database is locked"
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, **_pool_options(settings.DATABASE_URL))
+if is_sqlite:
+    event.listen(engine, "connect", _configure_sqlite)
 
-engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_url = _async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(async_url, **_pool_options(async_url))
+    if is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+    # Objects outlive the commits inside run_sync; reloading an expired
+    # attribute outside it would need a round trip the event loop can't make
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def get_sync_db():
+    """Plain Session, for work handed to executor threads (transcription, jobs)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+def _call_and_release(fn, db: Session, *args, **kwargs):
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+async def run_db(db: AnySession, fn, *args, **kwargs):
+    """
+    Run a synchronous CRUD function `fn(session, *args)` without blocking the
+    event loop: on the async driver via run_sync for an AsyncSession, on the
+    I/O executor for a plain Session.
+
+    The session is closed afterwards, handing its connection back to the
+    pool instead of holding it across the handler's other awaits. Returned
+    objects stay usable (models have no lazy relationships) and the session
+    reconnects on its next use.
+    """
+    if isinstance(db, AsyncSession):
+        try:
+            return await db.run_sync(fn, *args, **kwargs)
+        finally:
+            await db.close()
+    return await io_executor.run(_call_and_release, fn, db, *args, **kwargs)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Enum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Enum, Boolean, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import enum
@@ -24,23 +24,75 @@ class MediaFile(Base):
     __tablename__ = "media_files"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     filename = Column(String)
     file_path = Column(String)
     file_size = Column(Integer)
     mime_type = Column(String)
+    content_hash = Column(String, nullable=True, index=True)  # sha256 of the uploaded bytes
+    storage_key = Column(String, nullable=True)  # blob in the content-addressed store, None for legacy files
     duration = Column(Float, nullable=True)
     status = Column(String, default="uploaded")  # uploaded, processing, completed, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Serves keyset pagination of a user's history (newest first)
+        Index("ix_media_files_user_created", "user_id", "created_at", "id"),
+    )
+
 class Transcript(Base):
     __tablename__ = "transcripts"
     
     id = Column(Integer, primary_key=True, index=True)
-    media_file_id = Column(Integer)
+    media_file_id = Column(Integer, ForeignKey("media_files.id", ondelete="CASCADE"), index=True)
     content = Column(Text)
     language_code = Column(String, default="so")
     confidence_score = Column(Float, nullable=True)
     processing_time = Column(Float, nullable=True)
+    max_segment_duration = Column(Float, nullable=True)  # bounds segment range scans
+    vad_skipped_fraction = Column(Float, nullable=True)  # share of the audio VAD kept from the model
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TranscriptSegment(Base):
+    """One timed word of a transcript"""
+    __tablename__ = "transcript_segments"
+    
+    id = Column(Integer, primary_key=True)
+    transcript_id = Column(Integer, ForeignKey("transcripts.id", ondelete="CASCADE"), nullable=False)
+    start = Column(Float, nullable=False)
+    end = Column(Float, nullable=False)
+    text = Column(String)
+    confidence = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_transcript_segments_transcript_start", "transcript_id", "start"),
+    )
+
+class StorageBlob(Base):
+    """Reference count of a content-addressed blob shared by identical uploads"""
+    __tablename__ = "storage_blobs"
+    
+    key = Column(String, primary_key=True)
+    size = Column(Integer)
+    ref_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class TranscriptCacheEntry(Base):
+    """Model output for a given audio content hash, model and decoding config"""
+    __tablename__ = "transcript_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, nullable=False)
+    model_key = Column(String, nullable=False)
+    config_key = Column(String, nullable=False)
+    text = Column(Text)
+    segments = Column(Text)  # JSON-encoded list of word segments
+    language_code = Column(String, default="so")
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_transcript_cache_key", "content_hash", "model_key", "config_key", unique=True),
+    )
@@ -0,0 +1,29 @@
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from app.routers.auth import get_current_admin_user
+from app.services import profiling
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_current_admin_user)])
+
+@router.get("/profiles")
+def list_profiles() -> List[Dict]:
+    """
+    List stored transcription profiles, newest first
+    """
+    return profiling.list_profiles()
+
+@router.get("/profiles/{profile_id}/{artifact}")
+def get_profile_artifact(profile_id: str, artifact: str):
+    """
+    Download one artifact of a profile: the cProfile stats (pstats or
+    flame-graph collapsed stacks), the torch trace (chrome://tracing or
+    Perfetto), the torch operator table or the run metadata
+    """
+    path = profiling.artifact_path(profile_id, artifact)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile artifact not found")
+    
+    return FileResponse(path, media_type=profiling.ARTIFACTS[artifact], filename=f"{profile_id}-{artifact}")
@@ -1,35 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 from datetime import timedelta
-from app.db.database import get_db
+from typing import Optional
+from app.db.database import AnySession, get_db, run_db
 from app.crud import user as user_crud
+from app.models import UserRole
 from app.schemas.user import UserCreate, User, Token
-from app.core.security import create_access_token
+from app.core.security import create_access_token, decode_access_token
 from app.core.config import settings
-from jose import JWTError, jwt
+from app.services.auth_cache import principal_cache
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @router.post("/register", response_model=User)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AnySession = Depends(get_db)):
     # Check if user already exists
-    db_user = user_crud.get_user_by_email(db, email=user.email)
+    db_user = await run_db(db, user_crud.get_user_by_email, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    db_user = user_crud.get_user_by_username(db, username=user.username)
+    db_user = await run_db(db, user_crud.get_user_by_username, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
     
     # Create new user
-    new_user = user_crud.create_user(db=db, user=user)
+    new_user = await run_db(db, user_crud.create_user, user=user)
     return new_user
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = user_crud.authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AnySession = Depends(get_db)):
+    user = await run_db(db, user_crud.authenticate_user, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,24 +43,36 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-# Dependency for getting current user
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+async def authenticate_token(token: str, db: AnySession) -> Optional[User]:
+    """
+    Resolve an access token to its user, or None if it is invalid. Served
+    from the principal cache when possible, so repeat requests with the same
+    token cost no JWT verification and no query
+    """
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
     
-    user = user_crud.get_user_by_email(db, email=email)
+    payload = decode_access_token(token)
+    if not payload or payload.get("sub") is None:
+        return None
+    
+    db_user = await run_db(db, user_crud.get_user_by_email, email=payload["sub"])
+    if db_user is None:
+        return None
+    user = User.model_validate(db_user)
+    principal_cache.put(token, user, payload.get("exp"))
+    return user
+
+# Dependency for getting current user
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AnySession = Depends(get_db)):
+    user = await authenticate_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -67,6 +80,28 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
 @router.get("/users/me", response_model=User)
 def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
+
+@router.put("/users/{user_id}/active", response_model=User)
+async def set_user_active(
+    user_id: int,
+    is_active: bool,
+    db: AnySession = Depends(get_db),
+    admin: User = Depends(get_current_admin_user)
+):
+    """
+    Activate or deactivate a user (admin only). Deactivation takes effect
+    immediately in this process and within AUTH_CACHE_TTL_SECONDS elsewhere
+    """
+    db_user = await run_db(db, user_crud.set_user_active, user_id, is_active)
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    principal_cache.invalidate_user(user_id)
+    return db_user
@@ -1,21 +1,31 @@
+import asyncio
+import base64
+import hashlib
+import io
+import mimetypes
 import os
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-import uuid
-from app.db.database import get_db
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import FileResponse, Response
+import soundfile as sf
+from app.core.config import settings
+from app.db.database import AnySession, get_db, run_db
 from app.crud import media as media_crud
+from app.crud import storage as storage_crud
 from app.crud import user as user_crud
-from app.schemas.media import MediaFileCreate, MediaFileUpdate
+from app.schemas.media import MediaFileCreate, MediaFileUpdate, MediaFilePage
 from app.routers.auth import get_current_active_user
 from app.models import User
+from app.services.executor import io_executor
+from app.services.audio import decode_range
+from app.services.audio_cache import audio_cache
+from app.services.storage import get_storage, media_local_path
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/media", tags=["media"])
 
-# Create uploads directory
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 # Allowed file types
 ALLOWED_EXTENSIONS = {
     'audio': ['.mp3', '.wav', '.flac', '.m4a'],
@@ -23,80 +33,169 @@ ALLOWED_EXTENSIONS = {
 }
 
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+MAX_AUDIO_RANGE_SECONDS = 600
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+def _matches_signature(file_ext: str, head: bytes) -> bool:
+    """Check the leading bytes of an upload against its claimed container"""
+    if file_ext == '.wav':
+        return head[:4] == b'RIFF' and head[8:12] == b'WAVE'
+    if file_ext == '.avi':
+        return head[:4] == b'RIFF' and head[8:12] == b'AVI '
+    if file_ext == '.flac':
+        return head[:4] == b'fLaC'
+    if file_ext == '.mp3':
+        # ID3 tag or a bare MPEG audio frame sync
+        return head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0)
+    if file_ext in ('.m4a', '.mp4', '.mov'):
+        return head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip')
+    if file_ext in ('.mkv', '.webm'):
+        return head[:4] == b'\x1a\x45\xdf\xa3'
+    return False
+
+def _encode_wav(audio) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, 16000, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+def _encode_cursor(media_file) -> str:
+    raw = f"{media_file.created_at.isoformat()}|{media_file.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, media_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(media_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+def _discard_upload(buffer, path: str):
+    """Close and remove an abandoned upload; logs rather than raises so the original error surfaces"""
+    try:
+        buffer.close()
+        _remove_file(path)
+    except OSError as e:
+        logger.warning(f"Could not clean up partial upload {path}: {e}")
+
+def _display_name(filename: Optional[str]) -> str:
+    """Client file name without any directory part; never used as a path"""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    return name if name not in ("", ".", "..") else "upload"
 
 @router.post("/upload")
 async def upload_media(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    # Validate file size
-    contents = await file.read()
-    file_size = len(contents)
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 500MB.")
-    
-    # Reset file pointer
-    await file.seek(0)
-    
-    # Validate file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    # Validate file extension before reading anything
+    filename = _display_name(file.filename)
+    file_ext = os.path.splitext(filename)[1].lower()
     is_valid_audio = file_ext in ALLOWED_EXTENSIONS['audio']
     is_valid_video = file_ext in ALLOWED_EXTENSIONS['video']
     
     if not (is_valid_audio or is_valid_video):
         raise HTTPException(status_code=400, detail="Invalid file type. Supported formats: MP3, WAV, FLAC, M4A, MP4, MKV, AVI, MOV, WEBM")
     
-    # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        buffer.write(contents)
+    # Stored under its content hash once complete, so the client's file
+    # name never reaches the filesystem and identical uploads share a blob
+    storage = get_storage()
+    partial_path = storage.temp_path()
     
-    # Create media file record
-    media_file_create = MediaFileCreate(
-        filename=file.filename,
-        file_size=file_size,
-        mime_type=file.content_type
-    )
-    
-    db_media_file = media_crud.create_media_file(
-        db=db, 
-        media_file=media_file_create, 
-        user_id=current_user.id
-    )
+    # Stream to disk chunk by chunk, enforcing the size limit and hashing as
+    # bytes arrive so memory use doesn't depend on the upload size
+    hasher = hashlib.sha256()
+    file_size = 0
+    buffer = await io_executor.run(open, partial_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if file_size == 0 and not _matches_signature(file_ext, chunk[:16]):
+                raise HTTPException(status_code=400, detail="File content does not match its extension")
+            file_size += len(chunk)
+            if file_size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=400, detail="File too large. Maximum size is 500MB.")
+            hasher.update(chunk)
+            await io_executor.run(buffer.write, chunk)
+        await io_executor.run(buffer.close)
+        if file_size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        
+        # Reference the blob before it is written, so a concurrent delete
+        # of the last other copy cannot remove it from under this upload
+        content_hash = hasher.hexdigest()
+        await run_db(db, storage_crud.acquire_blob, content_hash, file_size)
+        try:
+            await io_executor.run(storage.put, partial_path, content_hash)
+        except BaseException:
+            await run_db(db, storage_crud.release_blob, content_hash, storage.delete)
+            raise
+    except BaseException:
+        # Not through io_executor: cleanup must run even when it is saturated
+        await asyncio.to_thread(_discard_upload, buffer, partial_path)
+        raise
     
-    # Update file path in database
-    media_update = MediaFileUpdate(file_path=file_path)
-    media_crud.update_media_file(db, db_media_file.id, media_update)
+    # Create media file record; any failure from here on must hand the
+    # blob reference back or the blob would never be collected
+    try:
+        media_file_create = MediaFileCreate(
+            filename=filename,
+            file_size=file_size,
+            mime_type=file.content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            file_path=storage.location(content_hash),
+            content_hash=content_hash,
+            storage_key=content_hash
+        )
+        db_media_file = await run_db(
+            db,
+            media_crud.create_media_file,
+            media_file=media_file_create, 
+            user_id=current_user.id
+        )
+    except BaseException:
+        await run_db(db, storage_crud.release_blob, content_hash, storage.delete)
+        raise
     
     return {
         "id": db_media_file.id,
-        "filename": file.filename,
+        "filename": filename,
         "file_size": file_size,
         "status": "uploaded",
         "message": "File uploaded successfully"
     }
 
-@router.get("/history")
+@router.get("/history", response_model=MediaFilePage)
 async def get_user_media_history(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    media_files = media_crud.get_user_media_files(db, current_user.id, skip, limit)
-    return media_files
+    """
+    The user's media files, newest first. Pass the returned next_cursor to
+    fetch the following page; it is null on the last page.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page exists
+    media_files = await run_db(db, media_crud.get_user_media_files, current_user.id, limit + 1, after)
+    next_cursor = _encode_cursor(media_files[limit - 1]) if len(media_files) > limit else None
+    return {"items": media_files[:limit], "next_cursor": next_cursor}
 
 @router.get("/{media_id}")
 async def get_media_info(
     media_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    media_file = media_crud.get_media_file(db, media_id)
+    media_file = await run_db(db, media_crud.get_media_file, media_id)
     if not media_file:
         raise HTTPException(status_code=404, detail="Media file not found")
     
@@ -109,10 +208,10 @@ async def get_media_info(
 @router.get("/{media_id}/download")
 async def download_media(
     media_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    media_file = media_crud.get_media_file(db, media_id)
+    media_file = await run_db(db, media_crud.get_media_file, media_id)
     if not media_file:
         raise HTTPException(status_code=404, detail="Media file not found")
     
@@ -120,22 +219,61 @@ async def download_media(
     if media_file.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this file")
     
-    if not os.path.exists(media_file.file_path):
+    try:
+        file_path = await io_executor.run(media_local_path, media_file)
+    except Exception as e:
+        logger.error(f"Could not fetch media {media_id} from storage: {e}")
+        raise HTTPException(status_code=404, detail="File not found on server")
+    if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
     
     return FileResponse(
-        path=media_file.file_path,
+        path=file_path,
         filename=media_file.filename,
         media_type=media_file.mime_type
     )
 
+@router.get("/{media_id}/audio")
+async def get_media_audio_range(
+    media_id: int,
+    start: float = Query(0.0, ge=0),
+    end: Optional[float] = Query(None, gt=0),
+    db: AnySession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Return a 16 kHz mono WAV excerpt of the media's audio between start and
+    end seconds, sliced from the decoded audio cache, or decoded directly
+    when the cache is disabled
+    """
+    media_file = await run_db(db, media_crud.get_media_file, media_id)
+    if not media_file:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    
+    # Check if user owns this file
+    if media_file.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this file")
+    
+    if end is None:
+        end = start + MAX_AUDIO_RANGE_SECONDS
+    if end <= start or end - start > MAX_AUDIO_RANGE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Range must be positive and at most {MAX_AUDIO_RANGE_SECONDS} seconds")
+    
+    file_path = await io_executor.run(media_local_path, media_file)
+    if settings.AUDIO_CACHE_ENABLED:
+        audio = await io_executor.run(audio_cache.load, media_id, file_path, start, end)
+    else:
+        audio = await io_executor.run(decode_range, file_path, start, end)
+    wav = await io_executor.run(_encode_wav, audio)
+    return Response(content=wav, media_type="audio/wav")
+
 @router.delete("/{media_id}")
 async def delete_media(
     media_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    media_file = media_crud.get_media_file(db, media_id)
+    media_file = await run_db(db, media_crud.get_media_file, media_id)
     if not media_file:
         raise HTTPException(status_code=404, detail="Media file not found")
     
@@ -143,11 +281,12 @@ async def delete_media(
     if media_file.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this file")
     
-    # Delete file from filesystem
-    if os.path.exists(media_file.file_path):
-        os.remove(media_file.file_path)
-    
-    # Delete from database
-    media_crud.delete_media_file(db, media_id)
+    # Delete the record first; the blob goes once nothing references it
+    await run_db(db, media_crud.delete_media_file, media_id)
+    await io_executor.run(audio_cache.remove, media_id)
+    if media_file.storage_key:
+        await run_db(db, storage_crud.release_blob, media_file.storage_key, get_storage().delete)
+    else:
+        await io_executor.run(_remove_file, media_file.file_path)
     
     return {"message": "Media file deleted successfully"}
@@ -0,0 +1,79 @@
+import asyncio
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, Query, status
+from app.db.database import AnySession, get_db
+from app.routers.auth import authenticate_token
+from app.services.asr import get_asr_model
+from app.services.executor import stream_executor, ExecutorSaturated
+from app.services.streaming import StreamingTranscriber, pcm_to_float
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/transcribe", tags=["transcription"])
+
+SAMPLE_FORMATS = {"s16le": 2, "f32le": 4}
+
+@router.websocket("/stream")
+async def transcribe_stream(
+    websocket: WebSocket,
+    token: str = Query(...),
+    sample_rate: int = Query(16000, ge=8000, le=48000),
+    sample_format: str = Query("s16le"),
+    db: AnySession = Depends(get_db)
+):
+    """
+    Live transcription over a WebSocket.
+
+    Authenticate with ?token=<access token>. Send mono PCM as binary
+    messages (s16le or f32le at sample_rate) and the text message "end"
+    when done. The server replies with JSON messages
+    {"type": "partial" | "final", "words": [{start, end, text, confidence}]},
+    with times in seconds from the start of the stream.
+    """
+    user = await authenticate_token(token, db)
+    if user is None or not user.is_active or sample_format not in SAMPLE_FORMATS:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    # The first connection may load the model; keep the event loop free meanwhile
+    asr_model = await asyncio.get_running_loop().run_in_executor(None, get_asr_model)
+    session = StreamingTranscriber(asr_model, sample_rate=sample_rate)
+    frame_bytes = SAMPLE_FORMATS[sample_format]
+    remainder = b""
+
+    async def send(result):
+        if result["final"]:
+            await websocket.send_json({"type": "final", "words": result["final"]})
+        if result["partial"]:
+            await websocket.send_json({"type": "partial", "words": result["partial"]})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") == "end":
+                break
+
+            payload = remainder + (message.get("bytes") or b"")
+            usable = len(payload) - len(payload) % frame_bytes
+            remainder = payload[usable:]
+            session.add_audio(pcm_to_float(payload[:usable], sample_format))
+
+            if session.due():
+                try:
+                    result = await stream_executor.run(session.process)
+                except ExecutorSaturated:
+                    # Skip this partial update; the next one covers the same audio
+                    continue
+                await send(result)
+
+        await send(await stream_executor.run(session.finish))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except ExecutorSaturated:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except Exception as e:
+        logger.error(f"Streaming transcription error: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
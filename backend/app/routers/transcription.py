@@ -1,35 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from typing import List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.core.config import settings
+from app.db.database import AnySession, get_db, get_sync_db, run_db
 from app.routers.auth import get_current_active_user
-from app.models import User
+from app.models import User, UserRole
 from app.services.transcription import transcription_service
-from app.crud import media as media_crud
+from app.services.jobs import get_job_manager
+from app.services.subtitles import FORMATS, group_cues, render, subtitle_etag
+from app.services.executor import inference_executor, io_executor, ExecutorSaturated
+from app.schemas.job import BatchTranscriptionItem, BatchTranscriptionJob, TranscriptionJob
+from app.schemas.transcript import BatchTranscriptionRequest, Segment
+from app.crud import media as media_crud, transcript as transcript_crud, segment as segment_crud
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/transcribe", tags=["transcription"])
 
+@router.post("/batch", response_model=BatchTranscriptionJob, status_code=202)
+async def submit_transcription_batch(
+    request: BatchTranscriptionRequest,
+    db: Session = Depends(get_sync_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue many media files for background transcription as one batch job.
+    Ownership is checked with one query; missing and foreign files are
+    reported as invalid and skipped. Returns at once; poll
+    GET /transcribe/batch/{job_id} for per-file progress. Only a full batch
+    queue rejects the request (503), never individual files.
+    """
+    media_ids = list(dict.fromkeys(request.media_ids))
+    if len(media_ids) > settings.BATCH_TRANSCRIBE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_TRANSCRIBE_MAX_ITEMS} media files per batch"
+        )
+    
+    media_files = {m.id: m for m in await run_db(db, media_crud.get_media_files, media_ids)}
+    items = []
+    for media_id in media_ids:
+        media_file = media_files.get(media_id)
+        error = None
+        if not media_file:
+            error = "Media file not found"
+        elif media_file.user_id != current_user.id:
+            error = "Not authorized to transcribe this file"
+        items.append(BatchTranscriptionItem(
+            media_id=media_id, status="invalid" if error else "queued", error=error
+        ).dict())
+    
+    # Smallest first, so the files running side by side put windows of
+    # similar length into the same batches
+    owned = sorted(
+        (media_files[item["media_id"]] for item in items if item["status"] == "queued"),
+        key=lambda m: m.file_size or 0
+    )
+    return await io_executor.run(get_job_manager().submit_batch, db, items, owned, current_user.id)
+
+@router.get("/batch/{job_id}", response_model=BatchTranscriptionJob)
+async def get_transcription_batch(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the status and per-file progress of a batch transcription job
+    """
+    job = get_job_manager().get(job_id)
+    if not job or job.get("kind") != "batch" or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Batch transcription job not found")
+    
+    return job
+
 @router.post("/{media_id}")
 async def transcribe_media(
     media_id: int,
-    db: Session = Depends(get_db),
+    profile: bool = Query(False, description="Profile this run (admins only)"),
+    # The session travels into the inference thread, so it must be a sync one
+    db: Session = Depends(get_sync_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Transcribe a media file
     """
+    if profile and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Profiling requires admin privileges")
+    
     try:
         # Verify media file exists and belongs to user
-        media_file = media_crud.get_media_file(db, media_id)
+        media_file = await run_db(db, media_crud.get_media_file, media_id)
         if not media_file:
             raise HTTPException(status_code=404, detail="Media file not found")
         
         if media_file.user_id != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to transcribe this file")
         
-        # Perform transcription
-        result = transcription_service.transcribe_media(db, media_id, current_user.id)
+        # Perform transcription off the event loop
+        result = await inference_executor.run(
+            transcription_service.transcribe_media, db, media_id, current_user.id, profile=profile
+        )
         
         return {
             "success": True,
@@ -37,31 +109,62 @@ async def transcribe_media(
             "data": result
         }
         
+    except (HTTPException, ExecutorSaturated):
+        raise
     except Exception as e:
         logger.error(f"Transcription error: {e}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
+@router.post("/{media_id}/jobs", response_model=TranscriptionJob, status_code=202)
+async def submit_transcription_job(
+    media_id: int,
+    db: Session = Depends(get_sync_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue a media file for background transcription and return the job
+    immediately; poll GET /transcribe/jobs/{job_id} for progress
+    """
+    media_file = await run_db(db, media_crud.get_media_file, media_id)
+    if not media_file:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    
+    if media_file.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to transcribe this file")
+    
+    return await io_executor.run(get_job_manager().submit, db, media_file, current_user.id)
+
+@router.get("/jobs/{job_id}", response_model=TranscriptionJob)
+async def get_transcription_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the status and progress of a transcription job
+    """
+    job = get_job_manager().get(job_id)
+    if not job or job.get("kind") == "batch" or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    
+    return job
+
 @router.get("/{media_id}")
 async def get_transcription(
     media_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get transcription results for a media file
     """
-    from app.crud import transcript as transcript_crud
-    
-    # Verify media file exists and belongs to user
-    media_file = media_crud.get_media_file(db, media_id)
+    # Verify media file exists and belongs to user, and get its transcript
+    media_file, transcript = await run_db(db, transcript_crud.get_media_file_with_transcript, media_id)
     if not media_file:
         raise HTTPException(status_code=404, detail="Media file not found")
     
     if media_file.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this transcription")
     
-    # Get transcript
-    transcript = transcript_crud.get_transcript_by_media_file(db, media_id)
     if not transcript:
         raise HTTPException(status_code=404, detail="Transcription not found")
     
@@ -69,3 +172,72 @@ async def get_transcription(
         "success": True,
         "data": transcript
     }
+
+@router.get("/{media_id}/segments", response_model=List[Segment])
+async def get_transcription_segments(
+    media_id: int,
+    start: float = Query(0.0, ge=0),
+    end: Optional[float] = Query(None, gt=0),
+    db: AnySession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the timed words of the latest transcript that overlap [start, end)
+    seconds; without end, everything from start to the end of the media
+    """
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    
+    media_file, transcript = await run_db(db, transcript_crud.get_media_file_with_transcript, media_id)
+    if not media_file:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    
+    if media_file.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this transcription")
+    
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    
+    return await run_db(
+        db, segment_crud.get_segments_in_range, transcript.id,
+        start, float("inf") if end is None else end, transcript.max_segment_duration
+    )
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+@router.get("/{media_id}/subtitles")
+async def get_subtitles(
+    media_id: int,
+    request: Request,
+    format: str = Query("srt", pattern="^(srt|vtt)$"),
+    db: AnySession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Export the latest transcript as SRT or WebVTT subtitles, streamed cue by cue
+    """
+    media_file, transcript = await run_db(db, transcript_crud.get_media_file_with_transcript, media_id)
+    if not media_file:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    
+    if media_file.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this transcription")
+    
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    
+    etag = subtitle_etag(transcript.id, format)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    
+    words = await run_db(db, segment_crud.get_segment_timings, transcript.id)
+    filename = f"{os.path.splitext(media_file.filename or 'subtitles')[0]}.{format}"
+    headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+    return StreamingResponse(
+        render(group_cues(words), format),
+        media_type=f"{FORMATS[format]}; charset=utf-8",
+        headers=headers
+    )
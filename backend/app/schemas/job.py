@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, List
+
+class TranscriptionJob(BaseModel):
+    job_id: str
+    media_file_id: int
+    status: str  # queued, processing, completed, failed
+    progress: float = 0.0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: float
+    updated_at: float
+
+class BatchTranscriptionItem(BaseModel):
+    media_id: int
+    status: str  # queued, processing, completed, failed or invalid (never run)
+    progress: float = 0.0
+    transcript_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchTranscriptionJob(BaseModel):
+    job_id: str
+    status: str  # queued, processing, completed (every item has finished) or failed
+    progress: float = 0.0  # mean over the items that run
+    items: List[BatchTranscriptionItem]
+    queued: int
+    processing: int
+    completed: int
+    failed: int
+    invalid: int
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
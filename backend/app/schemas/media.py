@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class MediaFileBase(BaseModel):
@@ -8,16 +8,20 @@ class MediaFileBase(BaseModel):
     file_size: int
 
 class MediaFileCreate(MediaFileBase):
-    pass
+    file_path: str = ""
+    content_hash: Optional[str] = None
+    storage_key: Optional[str] = None
 
 class MediaFileUpdate(BaseModel):
     status: Optional[str] = None
     duration: Optional[float] = None
+    file_path: Optional[str] = None
 
 class MediaFile(MediaFileBase):
     id: int
     user_id: int
     file_path: str
+    content_hash: Optional[str] = None
     status: str
     created_at: datetime
     updated_at: datetime
@@ -27,3 +31,7 @@ class MediaFile(MediaFileBase):
 
 class MediaFileResponse(MediaFile):
     pass
+
+class MediaFilePage(BaseModel):
+    items: List[MediaFile]
+    next_cursor: Optional[str] = None
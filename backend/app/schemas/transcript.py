@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 class TranscriptBase(BaseModel):
@@ -8,6 +8,8 @@ class TranscriptBase(BaseModel):
     language_code: str = "so"
     confidence_score: Optional[float] = None
     processing_time: Optional[float] = None
+    max_segment_duration: Optional[float] = None
+    vad_skipped_fraction: Optional[float] = None
 
 class TranscriptCreate(TranscriptBase):
     pass
@@ -22,3 +24,15 @@ class Transcript(TranscriptBase):
     
     class Config:
         from_attributes = True
+
+class Segment(BaseModel):
+    start: float
+    end: float
+    text: str
+    confidence: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+class BatchTranscriptionRequest(BaseModel):
+    media_ids: List[int] = Field(..., min_length=1)
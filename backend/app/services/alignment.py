@@ -0,0 +1,76 @@
+import numpy as np
+from typing import Callable, List, Dict, Optional, Sequence
+
+
+def align_words(
+    frame_ids: np.ndarray,
+    frame_confidences: np.ndarray,
+    tokens: Sequence[str],
+    blank_id: int,
+    delimiter_id: int,
+    frame_duration: float,
+    time_map: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+) -> List[Dict]:
+    """
+    Turn a greedy CTC path into word segments with real timings.
+
+    frame_ids are the argmax token ids per output frame and frame_confidences
+    the softmax posterior of that token. A word spans from the first frame of
+    its first character to the last frame of its last character, and its
+    confidence is the mean posterior over those character frames. Everything
+    is done with array operations over runs of identical ids, so the cost is
+    linear in the number of frames. time_map, if given, converts the frame
+    timeline (in seconds) to media time, e.g. when silence was cut out.
+    """
+    frame_ids = np.asarray(frame_ids)
+    frame_confidences = np.asarray(frame_confidences, dtype=np.float64)
+    num_frames = len(frame_ids)
+    if num_frames == 0:
+        return []
+
+    # Collapse the path into runs of identical ids
+    run_starts = np.flatnonzero(np.r_[True, frame_ids[1:] != frame_ids[:-1]])
+    run_ends = np.r_[run_starts[1:], num_frames]
+    run_ids = frame_ids[run_starts]
+
+    # Every delimiter run closes the current word; blanks never split words
+    word_of_run = np.cumsum(run_ids == delimiter_id)
+    is_char = (run_ids != blank_id) & (run_ids != delimiter_id)
+    if not is_char.any():
+        return []
+
+    char_starts = run_starts[is_char]
+    char_ends = run_ends[is_char]
+    char_ids = run_ids[is_char]
+    char_words = word_of_run[is_char]
+
+    # Boundaries between consecutive words among the character runs
+    first = np.flatnonzero(np.r_[True, char_words[1:] != char_words[:-1]])
+    last = np.r_[first[1:], len(char_words)] - 1
+
+    # Mean posterior over each word's character frames
+    run_word = np.full(len(run_ids), -1, dtype=np.int64)
+    run_word[is_char] = np.repeat(np.arange(len(first)), last - first + 1)
+    frame_word = np.repeat(run_word, run_ends - run_starts)
+    mask = frame_word >= 0
+    sums = np.bincount(frame_word[mask], weights=frame_confidences[mask], minlength=len(first))
+    counts = np.bincount(frame_word[mask], minlength=len(first))
+    confidences = sums / np.maximum(counts, 1)
+
+    starts = char_starts[first] * frame_duration
+    ends = char_ends[last] * frame_duration
+    if time_map is not None:
+        starts = time_map(starts)
+        ends = time_map(ends)
+    token_array = np.asarray(tokens, dtype=object)
+    texts = ["".join(t) for t in np.split(token_array[char_ids], first[1:])]
+
+    return [
+        {
+            "start": round(float(start), 3),
+            "end": round(float(end), 3),
+            "text": text,
+            "confidence": round(float(conf), 4),
+        }
+        for start, end, text, conf in zip(starts, ends, texts, confidences)
+    ]
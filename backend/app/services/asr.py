@@ -1,130 +1,378 @@
 import torch
-import librosa
 import numpy as np
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 import os
-from typing import List, Dict, Tuple
+import gc
+import tempfile
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Callable
 import logging
+from app.core.config import settings
+from app.services.audio import stream_audio, probe_duration
+from app.services.audio_cache import load_decoded, iter_array_blocks, spool_blocks
+from app.services.alignment import align_words
+from app.services.vad import VoiceActivityDetector, TimeMap, keep_regions
+from app.services.batching import BatchScheduler
+from app.services.ctc_decoder import BeamSearchDecoder
+from app.services.language_model import load_language_model
+from app.services.inference_backends import create_backend
+from app.services.metrics import timed_blocks, timed_stage
+from app.services import profiling
 
 logger = logging.getLogger(__name__)
 
 class SomaliASR:
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, backend: str = None):
         """
         Initialize Somali ASR model
         For now, we'll use a multilingual model that supports Somali
         In production, you'd want to fine-tune on Somali data
+
+        backend selects the inference engine (eager, quantized or onnx) and
+        defaults to ASR_BACKEND.
         """
-        self.model_name = model_name or " facebook/wav2vec2-large-xlsr-53"
+        self.model_name = model_name or settings.ASR_MODEL_NAME
+        self.backend_name = backend or settings.ASR_BACKEND
         
         try:
             # Load pre-trained model and processor
-            self.processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-large-xlsr-53")
-            self.model = Wav2Vec2ForCTC.from_pretrained("facebook/wav2vec2-large-xlsr-53")
+            self.processor = Wav2Vec2Processor.from_pretrained(self.model_name, revision=settings.ASR_MODEL_REVISION)
+            model = Wav2Vec2ForCTC.from_pretrained(self.model_name, revision=settings.ASR_MODEL_REVISION)
             
             # Move model to GPU if available
             self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            self.model.to(self.device)
-            self.model.eval()
+            model.to(self.device)
+            model.eval()
+
+            # Engine used for forward passes. The quantized and ONNX backends
+            # hold their own copy, so the fp32 weights are freed here unless
+            # the eager backend still runs them.
+            self.config = model.config
+            self.backend = create_backend(
+                self.backend_name, model, self.device, self.model_name, settings.ASR_MODEL_REVISION
+            )
+            del model
+            gc.collect()
+
+            # CTC alignment metadata
+            self.frame_stride = getattr(self.config, "inputs_to_logits_ratio", 320)
+            tokenizer = self.processor.tokenizer
+            self.tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+            self.blank_id = tokenizer.pad_token_id
+            self.delimiter_id = tokenizer.word_delimiter_token_id
+
+            # Greedy argmax unless beam search is configured
+            self.beam_decoder = None
+            if settings.ASR_DECODER == "beam":
+                self.beam_decoder = BeamSearchDecoder(
+                    self.tokens,
+                    self.blank_id,
+                    self.delimiter_id,
+                    beam_width=settings.ASR_BEAM_WIDTH,
+                    token_min_logp=settings.ASR_BEAM_TOKEN_MIN_LOGP,
+                    blank_skip_prob=settings.ASR_BEAM_BLANK_SKIP_PROB,
+                    beam_prune_logp=settings.ASR_BEAM_PRUNE_LOGP,
+                    lm=load_language_model(settings.ASR_LM_PATH) if settings.ASR_LM_PATH else None,
+                    alpha=settings.ASR_LM_ALPHA,
+                    beta=settings.ASR_LM_BETA,
+                )
+            elif settings.ASR_DECODER != "greedy":
+                raise ValueError(f"Unknown ASR_DECODER: {settings.ASR_DECODER}")
+
+            # Cross-request micro-batching of forward passes
+            self.batcher = None
+            if settings.ASR_BATCHING:
+                self.batcher = BatchScheduler(
+                    self._forward_batch,
+                    max_batch_size=settings.ASR_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.ASR_BATCH_MAX_WAIT_MS,
+                )
             
-            logger.info("ASR model loaded successfully")
+            logger.info(f"ASR model loaded successfully ({self.backend_name} backend)")
         except Exception as e:
             logger.error(f"Failed to load ASR model: {e}")
             raise
 
-    def preprocess_audio(self, audio_path: str) -> np.ndarray:
+    def _audio_blocks(self, audio_path: str, decoded_path: Optional[str] = None) -> Iterator[np.ndarray]:
+        """16 kHz mono blocks from a cached decode if available, else from the source file"""
+        if decoded_path is not None:
+            return iter_array_blocks(load_decoded(decoded_path))
+        return stream_audio(audio_path, sr=16000)
+
+    def preprocess_audio(self, audio_path: str, decoded_path: Optional[str] = None) -> Iterator[np.ndarray]:
         """
-        Preprocess audio file for ASR
+        Stream the audio file as 16 kHz mono blocks. No gain is applied: the
+        processor normalises every window to zero mean and unit variance.
         """
         try:
-            # Load audio file
-            audio, sr = librosa.load(audio_path, sr=16000)
-            
-            # Normalize audio
-            audio = audio / np.max(np.abs(audio))
-            
-            return audio
+            yield from self._audio_blocks(audio_path, decoded_path)
         except Exception as e:
             logger.error(f"Error preprocessing audio: {e}")
             raise
 
-    def transcribe(self, audio_path: str) -> Dict:
+    def _total_samples(self, audio_path: str, decoded_path: Optional[str] = None) -> int:
+        """Length of the 16 kHz audio for progress reporting, 0 if unknown without decoding"""
+        if decoded_path is not None:
+            return os.path.getsize(decoded_path) // 4
+        duration = probe_duration(audio_path)
+        return int(duration * 16000) if duration else 0
+
+    def transcribe(self, audio_path: str, progress_callback: Optional[Callable[[float], None]] = None,
+                   decoded_path: Optional[str] = None) -> Dict:
         """
         Transcribe audio file and return segments with timestamps
+
+        progress_callback, if given, is called with the completed fraction
+        (0.0-1.0) after every inference window. decoded_path points at an
+        already decoded 16 kHz float32 copy (see audio_cache), which is then
+        memory-mapped instead of decoding audio_path again. Without one, VAD
+        spools its decode to a temporary file that inference then reads.
         """
+        spool_path = None
         try:
-            # Preprocess audio
-            audio = self.preprocess_audio(audio_path)
-            
-            # Process audio
-            input_values = self.processor(
-                audio, 
-                sampling_rate=16000, 
-                return_tensors="pt", 
-                padding="longest"
-            ).input_values
+            time_map = None
+            if settings.VAD_ENABLED:
+                # Speech regions have to be known before inference starts
+                vad = VoiceActivityDetector()
+                blocks = self._audio_blocks(audio_path, decoded_path)
+                if decoded_path is None:
+                    # Keep the decode VAD reads so inference maps it instead
+                    # of decoding the source a second time
+                    fd, spool_path = tempfile.mkstemp(suffix=".f32")
+                    os.close(fd)
+                    blocks = spool_blocks(blocks, spool_path)
+                with timed_stage("vad"):
+                    regions, duration, _ = vad.analyse(blocks)
+                if spool_path is not None:
+                    decoded_path = spool_path
+                time_map = TimeMap(regions)
+                total_samples = time_map.speech_samples
+                blocks = keep_regions(self.preprocess_audio(audio_path, decoded_path), regions)
+            else:
+                total_samples = self._total_samples(audio_path, decoded_path)
+                blocks = self.preprocess_audio(audio_path, decoded_path)
             
-            # Move to device
-            input_values = input_values.to(self.device)
-            
-            # Get logits
-            with torch.no_grad():
-                logits = self.model(input_values).logits
-            
-            # Get predicted ids
-            predicted_ids = torch.argmax(logits, dim=-1)
+            # Run windowed inference so peak memory is bounded by the window size
+            predicted_ids, confidences, log_probs = self._predict_frames(
+                timed_blocks(blocks, "decode"),
+                total_samples=total_samples,
+                progress_callback=progress_callback
+            )
             
             # Decode predictions
-            transcription = self.processor.batch_decode(predicted_ids)
+            with timed_stage("ctc_decode"):
+                if self.beam_decoder is not None:
+                    predicted_ids, confidences = self.beam_decoder.decode(log_probs)
+                transcription = self.processor.batch_decode([predicted_ids])
+            with timed_stage("alignment"):
+                segments = self._create_segments(predicted_ids, confidences, time_map)
             
-            # For now, return simple transcription
-            # In future, we'll add timestamp alignment
             result = {
                 "text": transcription[0],
-                "segments": self._create_segments(transcription[0], audio_path),
+                "segments": segments,
                 "language": "so"  # Somali language code
             }
+
+            if time_map is not None:
+                skipped = 1.0 - total_samples / (duration * 16000) if duration > 0 else 0.0
+                result["vad"] = {
+                    "speech_regions": len(regions),
+                    "speech_seconds": round(total_samples / 16000, 3),
+                    "skipped_fraction": round(skipped, 4),
+                }
+                logger.info(f"VAD skipped {skipped:.1%} of {duration:.1f}s of audio")
             
             return result
             
         except Exception as e:
             logger.error(f"Error during transcription: {e}")
             raise
+        finally:
+            if spool_path is not None and os.path.exists(spool_path):
+                os.remove(spool_path)
 
-    def _create_segments(self, text: str, audio_path: str) -> List[Dict]:
+    def _iter_windows(self, blocks: Iterable[np.ndarray], sampling_rate: int = 16000):
         """
-        Create basic segments (will be enhanced later with proper alignment)
+        Assemble a stream of audio blocks into overlapping windows.
+
+        Yields (window, left_context, right_context) where the context counts
+        are the number of samples at each edge that only serve as acoustic
+        context and must be discarded when stitching the outputs back together.
+        Only the samples of the current window are buffered.
         """
-        # Simple word splitting for demonstration
-        words = text.split()
-        segments = []
-        
-        if words:
-            # Estimate duration from file (this is simplified)
-            try:
-                duration = librosa.get_duration(filename=audio_path)
-                words_per_second = len(words) / duration if duration > 0 else 1
-                
-                start_time = 0
-                for i, word in enumerate(words):
-                    end_time = min(start_time + (1/words_per_second), duration)
-                    segments.append({
-                        "start": start_time,
-                        "end": end_time,
-                        "text": word,
-                        "confidence": 0.9  # Placeholder confidence
-                    })
-                    start_time = end_time
-            except:
-                # Fallback if duration calculation fails
-                segments = [{
-                    "start": 0,
-                    "end": 10,  # Default 10 seconds
-                    "text": text,
-                    "confidence": 0.9
-                }]
-        
-        return segments
+        chunk_len = int(settings.ASR_CHUNK_LENGTH_S * sampling_rate)
+        stride_len = int(settings.ASR_CHUNK_STRIDE_S * sampling_rate)
+        if chunk_len <= 2 * stride_len:
+            raise ValueError("ASR_CHUNK_LENGTH_S must be more than twice ASR_CHUNK_STRIDE_S")
+
+        step = chunk_len - 2 * stride_len
+        blocks = iter(blocks)
+        buffer = np.zeros(0, dtype=np.float32)
+        buffer_start = 0  # absolute sample index of buffer[0]
+        chunk_start = 0
+        exhausted = False
+
+        while True:
+            window_start = max(chunk_start - stride_len, 0)
+            wanted_end = chunk_start + step + stride_len
+
+            # Read one sample past the window so we know whether it is the last
+            while not exhausted and buffer_start + len(buffer) <= wanted_end:
+                block = next(blocks, None)
+                if block is None:
+                    exhausted = True
+                else:
+                    buffer = np.concatenate([buffer, block])
+
+            available = buffer_start + len(buffer)
+            if chunk_start >= available:
+                break
+
+            window_end = min(wanted_end, available)
+            is_last = window_end >= available
+            window = buffer[window_start - buffer_start:window_end - buffer_start]
+            yield window, chunk_start - window_start, 0 if is_last else stride_len
+            if is_last:
+                break
+
+            chunk_start += step
+            consumed = max(chunk_start - stride_len, 0) - buffer_start
+            buffer = buffer[consumed:]
+            buffer_start += consumed
+
+    def _forward(self, window: np.ndarray) -> torch.Tensor:
+        """Run one forward pass and return the (frames, vocab) logits"""
+        with timed_stage("feature_extraction"):
+            input_values = self.processor(
+                window,
+                sampling_rate=16000,
+                return_tensors="pt",
+                padding="longest"
+            ).input_values.to(self.device)
+
+        with timed_stage("forward"):
+            return self.backend(input_values)[0]
+
+    def _forward_batch(self, windows: List[np.ndarray]) -> List[torch.Tensor]:
+        """
+        Run one padded forward pass over several windows and return each
+        window's (frames, vocab) logits with the padding frames removed
+        """
+        with timed_stage("feature_extraction"):
+            inputs = self.processor(
+                windows,
+                sampling_rate=16000,
+                return_tensors="pt",
+                padding="longest",
+                return_attention_mask=True
+            )
+            input_values = inputs.input_values.to(self.device)
+            attention_mask = inputs.attention_mask.to(self.device)
+
+        with timed_stage("forward"):
+            logits = self.backend(input_values, attention_mask)
+
+        output_lengths = [self._output_length(len(w)) for w in windows]
+        return [logits[i, :n] for i, n in enumerate(output_lengths)]
+
+    def _output_length(self, num_samples: int) -> int:
+        """Logit frames the feature encoder produces for num_samples of audio"""
+        length = num_samples
+        for kernel, stride in zip(self.config.conv_kernel, self.config.conv_stride):
+            length = (length - kernel) // stride + 1
+        if getattr(self.config, "add_adapter", False):
+            for _ in range(self.config.num_adapter_layers):
+                length = (length - 1) // self.config.adapter_stride + 1
+        return length
+
+    def _submit_window(self, window: np.ndarray) -> Future:
+        """
+        Hand a window to the batch scheduler, or run it inline if batching is
+        off or the caller is being profiled (so the forward pass is captured)
+        """
+        if self.batcher is not None and not profiling.is_active():
+            return self.batcher.submit(window)
+        future = Future()
+        future.set_result(self._forward(window))
+        return future
+
+    def _predict_frames(
+        self,
+        blocks: Iterable[np.ndarray],
+        total_samples: int = 0,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """
+        Greedy CTC ids and their posteriors for the whole recording, computed
+        window by window, plus the full (frames, vocab) log-posteriors when
+        beam search needs them (None otherwise).
+
+        Only the argmax id and its softmax probability for the central
+        (non-context) frames of each window are kept, so memory grows with the
+        number of output frames rather than with attention/logit size over the
+        full file. Beam search adds one float32 row of vocabulary size per frame. Kept frame counts are derived from the model's fixed frame
+        stride so timestamps do not drift across seams. Up to
+        ASR_BATCH_MAX_SIZE windows are kept in flight so the batch scheduler
+        can pack them with windows from other requests.
+        """
+        id_pieces = []
+        confidence_pieces = []
+        log_prob_pieces = []
+        processed = 0
+        in_flight = deque()
+
+        def collect():
+            nonlocal processed
+            future, window_len, left, right = in_flight.popleft()
+            logits = future.result()
+            drop_left = int(round(left / self.frame_stride))
+            keep = int(round((window_len - left - right) / self.frame_stride))
+            kept = logits[drop_left:drop_left + keep]
+            with timed_stage("frame_posteriors"):
+                if self.beam_decoder is not None:
+                    log_probs = torch.log_softmax(kept.float(), dim=-1)
+                    log_prob_pieces.append(log_probs.cpu().numpy())
+                    log_confidences, ids = log_probs.max(dim=-1)
+                    confidences = log_confidences.exp()
+                else:
+                    confidences, ids = torch.softmax(kept, dim=-1).max(dim=-1)
+                id_pieces.append(ids.cpu().numpy())
+                confidence_pieces.append(confidences.cpu().numpy())
+
+            processed += window_len - left - right
+            if progress_callback is not None and total_samples > 0:
+                progress_callback(min(processed / total_samples, 1.0))
+
+        lookahead = settings.ASR_BATCH_MAX_SIZE if self.batcher is not None else 1
+        for window, left, right in self._iter_windows(blocks):
+            in_flight.append((self._submit_window(window), len(window), left, right))
+            if len(in_flight) >= lookahead:
+                collect()
+        while in_flight:
+            collect()
+
+        log_probs = None
+        if self.beam_decoder is not None:
+            log_probs = np.concatenate(log_prob_pieces) if log_prob_pieces else np.zeros((0, len(self.tokens)), np.float32)
+        if not id_pieces:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), log_probs
+        return np.concatenate(id_pieces), np.concatenate(confidence_pieces), log_probs
+
+    def _create_segments(self, predicted_ids: np.ndarray, confidences: np.ndarray,
+                         time_map: Optional[TimeMap] = None) -> List[Dict]:
+        """
+        Create word segments with timings and confidences from the CTC path
+        """
+        return align_words(
+            predicted_ids,
+            confidences,
+            tokens=self.tokens,
+            blank_id=self.blank_id,
+            delimiter_id=self.delimiter_id,
+            frame_duration=self.frame_stride / 16000,
+            time_map=time_map,
+        )
 
 # Global instance
 asr_model = None
@@ -134,6 +382,14 @@ def get_asr_model():
     global asr_model
     if asr_model is None:
         logger.info("Loading ASR model...")
-        asr_model = SomaliASR()
+        model = SomaliASR()
+        if settings.ASR_WORKER_PROCESSES > 0:
+            from app.services.worker_pool import ASRWorkerPool
+            model = ASRWorkerPool(
+                model,
+                processes=settings.ASR_WORKER_PROCESSES,
+                threads_per_worker=settings.ASR_WORKER_THREADS or None
+            )
+        asr_model = model
         logger.info("ASR model loaded successfully")
     return asr_model
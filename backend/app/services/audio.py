@@ -0,0 +1,145 @@
+import os
+import shutil
+import subprocess
+import numpy as np
+import soundfile as sf
+import soxr
+from typing import Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+BLOCK_FRAMES = 65536  # frames read from the source per block
+
+# Containers whose audio is always extracted with ffmpeg
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.webm')
+
+
+def _ffmpeg_exe() -> str:
+    """Locate an ffmpeg binary (system install first, then imageio-ffmpeg)"""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def _stream_soundfile(audio_path: str, sr: int, block_frames: int) -> Iterator[np.ndarray]:
+    """Block-read a file with libsndfile, downmixing and resampling on the fly"""
+    with sf.SoundFile(audio_path) as f:
+        resampler = None
+        if f.samplerate != sr:
+            resampler = soxr.ResampleStream(f.samplerate, sr, 1, dtype="float32")
+
+        while True:
+            block = f.read(block_frames, dtype="float32", always_2d=True)
+            last = len(block) < block_frames
+            mono = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=last)
+            if len(mono):
+                yield mono
+            if last:
+                break
+
+
+def _stream_ffmpeg(audio_path: str, sr: int, block_frames: int,
+                   audio_stream_only: bool = False) -> Iterator[np.ndarray]:
+    """
+    Decode anything ffmpeg understands into raw mono float32 PCM over a pipe
+
+    With audio_stream_only, only the first audio stream is mapped, so video,
+    subtitle and data packets are demuxed and dropped without being decoded.
+    """
+    cmd = [_ffmpeg_exe(), "-nostdin", "-hide_banner", "-nostats", "-v", "error", "-i", audio_path]
+    if audio_stream_only:
+        cmd += ["-map", "0:a:0", "-sn", "-dn"]
+    cmd += ["-vn", "-ac", "1", "-ar", str(sr), "-f", "f32le", "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        block_bytes = block_frames * 4
+        while True:
+            raw = proc.stdout.read(block_bytes)
+            if not raw:
+                break
+            yield np.frombuffer(raw, dtype=np.float32)
+        if proc.wait() != 0:
+            error = proc.stderr.read().decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {error}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def stream_audio(audio_path: str, sr: int = TARGET_SAMPLE_RATE,
+                 block_frames: int = BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """
+    Yield the audio as consecutive mono float32 blocks at `sr` Hz.
+
+    Video containers go straight to ffmpeg audio-stream extraction, formats
+    libsndfile can read are decoded in-process and everything else is piped
+    through ffmpeg. Memory use is bounded by the block size.
+    """
+    if os.path.splitext(audio_path)[1].lower() in VIDEO_EXTENSIONS:
+        yield from extract_audio_stream(audio_path, sr, block_frames)
+        return
+
+    try:
+        # Opening is cheap and tells us whether libsndfile supports the format
+        sf.info(audio_path)
+    except Exception:
+        logger.debug(f"libsndfile cannot read {audio_path}, using ffmpeg")
+        yield from _stream_ffmpeg(audio_path, sr, block_frames)
+        return
+
+    yield from _stream_soundfile(audio_path, sr, block_frames)
+
+
+def extract_audio_stream(video_path: str, sr: int = TARGET_SAMPLE_RATE,
+                         block_frames: int = BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """
+    Pipe the first audio stream of a video container out of ffmpeg as
+    16 kHz mono float32 blocks, with no intermediate file
+    """
+    yield from _stream_ffmpeg(video_path, sr, block_frames, audio_stream_only=True)
+
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """
+    Duration in seconds read from the file header without decoding, or None
+    for formats only ffmpeg can read
+    """
+    if os.path.splitext(audio_path)[1].lower() in VIDEO_EXTENSIONS:
+        return None
+    try:
+        info = sf.info(audio_path)
+    except Exception:
+        return None
+    return info.frames / info.samplerate if info.samplerate else None
+
+
+def decode_range(audio_path: str, start: float, end: float, sr: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode only as far as `end` seconds and return the mono float32 samples
+    between start and end, for reads that bypass the decoded audio cache
+    """
+    first = max(int(start * sr), 0)
+    last = max(int(end * sr), first)
+    pieces = []
+    position = 0
+    blocks = stream_audio(audio_path, sr=sr)
+    try:
+        for block in blocks:
+            if position + len(block) > first:
+                pieces.append(block[max(first - position, 0):last - position])
+            position += len(block)
+            if position >= last:
+                break
+    finally:
+        # Stops an ffmpeg pipe that still has audio past the range
+        blocks.close()
+    return np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
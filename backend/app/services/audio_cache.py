@@ -0,0 +1,118 @@
+import os
+import uuid
+from typing import Iterator, Optional
+import numpy as np
+import logging
+
+from app.core.config import settings
+from app.services.audio import stream_audio, TARGET_SAMPLE_RATE, BLOCK_FRAMES
+
+logger = logging.getLogger(__name__)
+
+
+def load_decoded(path: str) -> np.ndarray:
+    """Memory-map a cached decode as a read-only float32 array"""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="r")
+
+
+def iter_array_blocks(audio: np.ndarray, block_frames: int = BLOCK_FRAMES) -> Iterator[np.ndarray]:
+    """Yield zero-copy views of an array in block_frames-sized pieces"""
+    for start in range(0, len(audio), block_frames):
+        yield audio[start:start + block_frames]
+
+
+def spool_blocks(blocks: Iterator[np.ndarray], path: str) -> Iterator[np.ndarray]:
+    """Pass blocks through while writing them to path in the format load_decoded maps"""
+    with open(path, "wb") as f:
+        for block in blocks:
+            f.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+            yield block
+
+
+class DecodedAudioCache:
+    """
+    Decoded 16 kHz mono float32 audio, persisted once per media file.
+
+    Each entry is a headerless float32 file that later transcriptions,
+    retries and range reads memory-map and slice without copying. Entries
+    are evicted least-recently-used (by mtime, refreshed on every access)
+    once the directory exceeds its byte budget. Deleting a file that is
+    still mapped is safe; the mapping stays valid until it is closed.
+    """
+
+    def __init__(self, cache_dir: str = settings.AUDIO_CACHE_DIR,
+                 max_bytes: int = settings.AUDIO_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, media_file_id: int) -> str:
+        return os.path.join(self.cache_dir, f"{media_file_id}.f32")
+
+    def ensure(self, media_file_id: int, source_path: str) -> str:
+        """Return the cached decode's path, decoding the source on a miss"""
+        path = self.path_for(media_file_id)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for block in stream_audio(source_path, sr=TARGET_SAMPLE_RATE):
+                    f.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def load(self, media_file_id: int, source_path: str,
+             start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """Zero-copy slice of the decoded audio between start and end seconds"""
+        audio = load_decoded(self.ensure(media_file_id, source_path))
+        first = max(int(start * TARGET_SAMPLE_RATE), 0)
+        last = len(audio) if end is None else min(int(end * TARGET_SAMPLE_RATE), len(audio))
+        return audio[first:max(first, last)]
+
+    def remove(self, media_file_id: int):
+        path = self.path_for(media_file_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used entries until the cache fits its budget"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".f32"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.join(self.cache_dir, name) == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} decoded audio files from cache")
+        return removed
+
+
+audio_cache = DecodedAudioCache()
@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.schemas.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache from verified access tokens to their user.
+
+    A hit skips both the JWT signature check and the user query on the
+    authenticated request path. Entries live for at most ttl seconds and
+    never beyond the token's own expiry; the least recently used entry is
+    dropped once max_entries is reached. Deactivating a user must call
+    invalidate_user() so their tokens stop resolving in this process.
+    """
+
+    def __init__(self, max_entries: int = settings.AUTH_CACHE_MAX_ENTRIES,
+                 ttl: float = settings.AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._entries[token] = (expires_at, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Forget every cached token of a user"""
+        with self._lock:
+            tokens = [token for token, (_, user) in self._entries.items() if user.id == user_id]
+            for token in tokens:
+                del self._entries[token]
+        if tokens:
+            logger.info(f"Dropped {len(tokens)} cached tokens of user {user_id}")
+        return len(tokens)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Micro-batching front end for the acoustic model.
+
+    Callers from any thread submit single audio windows and get a Future for
+    that window's logits. A dedicated thread drains the queue, waiting at most
+    `max_wait_ms` for up to `max_batch_size` windows, splits them into
+    length buckets so little compute is spent on padding, runs one forward
+    pass per bucket and routes each slice of the output back to its Future.
+    """
+
+    def __init__(
+        self,
+        forward_batch: Callable[[List[np.ndarray]], Sequence],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        bucket_samples: int = 2 * 16000,
+    ):
+        self.forward_batch = forward_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_samples = bucket_samples
+
+        # Simple counters for checking how well requests are being packed
+        self.batches_run = 0
+        self.windows_run = 0
+
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.windows_run / self.batches_run if self.batches_run else 0.0
+
+    def submit(self, window: np.ndarray) -> Future:
+        """Queue one window; the Future resolves to its (frames, vocab) logits"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((window, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        """Block for the first request, then gather more until full or timed out"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _buckets(self, batch: List[Tuple[np.ndarray, Future]]):
+        """Group requests whose lengths fall in the same bucket"""
+        buckets = {}
+        for item in batch:
+            key = -(-len(item[0]) // self.bucket_samples)
+            buckets.setdefault(key, []).append(item)
+        return buckets.values()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            for group in self._buckets(batch):
+                # Skip windows whose caller has already given up
+                group = [item for item in group if item[1].set_running_or_notify_cancel()]
+                if not group:
+                    continue
+                try:
+                    outputs = self.forward_batch([window for window, _ in group])
+                except Exception as e:
+                    logger.error(f"Batched forward pass failed: {e}")
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+
+                self.batches_run += 1
+                self.windows_run += len(group)
+                for (_, future), output in zip(group, outputs):
+                    future.set_result(output)
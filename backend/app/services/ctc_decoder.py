@@ -0,0 +1,248 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import logging
+
+from app.services.language_model import NgramLanguageModel
+
+logger = logging.getLogger(__name__)
+
+NEG_INF = float("-inf")
+
+
+def _logaddexp(a: float, b: float) -> float:
+    if a == NEG_INF:
+        return b
+    if b == NEG_INF:
+        return a
+    if a > b:
+        return a + math.log1p(math.exp(b - a))
+    return b + math.log1p(math.exp(a - b))
+
+
+class _Prefix:
+    """
+    One node of the prefix tree: the emitted token, the frame it was first
+    emitted at and the LM state after it. Prefixes are extended by linking
+    to their parent, so extending a beam is O(1) however long the text is.
+    """
+
+    __slots__ = ("parent", "token", "frame", "word", "lm_state", "lm_score")
+
+    def __init__(self, parent, token: int, frame: int, word: str, lm_state, lm_score: float):
+        self.parent = parent
+        self.token = token
+        self.frame = frame
+        self.word = word  # characters of the unfinished last word
+        self.lm_state = lm_state
+        self.lm_score = lm_score  # weighted LM score plus word bonuses so far
+
+    def emissions(self) -> List[Tuple[int, int]]:
+        """(token, frame) pairs from the first emitted token to this one"""
+        node, out = self, []
+        while node.parent is not None:
+            out.append((node.token, node.frame))
+            node = node.parent
+        out.reverse()
+        return out
+
+
+class BeamSearchDecoder:
+    """
+    CTC prefix beam search with optional n-gram shallow fusion.
+
+    Every frame, only tokens with a log-probability of at least
+    token_min_logp are tried (at most beam_width of them), and runs of
+    frames whose blank probability is at least blank_skip_prob are folded
+    into a single all-blank step. Beams scoring more than beam_prune_logp
+    below the best are dropped. With a language model, every completed
+    word adds alpha * ln P(word | history) + beta to its prefix.
+
+    decode() returns a per-frame token path in the same form as greedy
+    argmax ids, so text and word timings come out of the same
+    batch_decode and align_words code as greedy decoding.
+    """
+
+    def __init__(
+        self,
+        tokens: Sequence[str],
+        blank_id: int,
+        delimiter_id: int,
+        beam_width: int = 16,
+        token_min_logp: float = -5.0,
+        blank_skip_prob: float = 0.999,
+        beam_prune_logp: float = -10.0,
+        lm: Optional[NgramLanguageModel] = None,
+        alpha: float = 0.5,
+        beta: float = 1.0,
+    ):
+        self.tokens = list(tokens)
+        self.blank_id = blank_id
+        self.delimiter_id = delimiter_id
+        self.beam_width = beam_width
+        self.token_min_logp = token_min_logp
+        self.blank_skip_logp = math.log(blank_skip_prob) if blank_skip_prob < 1 else math.inf
+        self.beam_prune_logp = beam_prune_logp
+        self.lm = lm
+        self.alpha = alpha
+        self.beta = beta
+
+    def _word_score(self, node: _Prefix) -> Tuple[float, object]:
+        """LM score and state after closing the node's unfinished word"""
+        log_prob, state = self.lm.score_ln(node.lm_state, node.word)
+        return self.alpha * log_prob + self.beta, state
+
+    def _extend(self, node: _Prefix, token: int, frame: int) -> _Prefix:
+        if token == self.delimiter_id:
+            if self.lm is not None and node.word:
+                score, state = self._word_score(node)
+                return _Prefix(node, token, frame, "", state, node.lm_score + score)
+            return _Prefix(node, token, frame, "", node.lm_state, node.lm_score)
+        return _Prefix(node, token, frame, node.word + self.tokens[token], node.lm_state, node.lm_score)
+
+    def _candidates(self, log_probs: np.ndarray) -> List[Optional[np.ndarray]]:
+        """Non-blank tokens worth trying per frame, or None for skippable blank frames"""
+        blank = log_probs[:, self.blank_id]
+        masked = log_probs.copy()
+        masked[:, self.blank_id] = NEG_INF
+        k = min(self.beam_width, masked.shape[1] - 1)
+        top = np.argpartition(-masked, k - 1, axis=1)[:, :k] if k > 0 else np.zeros((len(masked), 0), np.int64)
+        top_logp = np.take_along_axis(masked, top, axis=1)
+        best = top_logp.max(axis=1, initial=NEG_INF)
+
+        candidates: List[Optional[np.ndarray]] = []
+        for t in range(len(log_probs)):
+            if blank[t] >= self.blank_skip_logp:
+                candidates.append(None)
+                continue
+            keep = top_logp[t] >= min(self.token_min_logp, best[t])
+            candidates.append(top[t][keep])
+        return candidates
+
+    def decode(self, log_probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best path for (frames, vocab) natural-log posteriors, as per-frame
+        token ids and the posterior of each frame's token
+        """
+        num_frames = len(log_probs)
+        if num_frames == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        log_probs = np.asarray(log_probs, dtype=np.float32)
+        candidates = self._candidates(log_probs)
+        blank_id = self.blank_id
+        blank_cumsum = np.r_[0.0, np.cumsum(log_probs[:, blank_id], dtype=np.float64)]
+
+        root = _Prefix(None, -1, -1, "", self.lm.begin_state() if self.lm is not None else None, 0.0)
+        # prefix -> [log P(ending in blank), log P(ending in its last token)]
+        beams: Dict[_Prefix, List[float]] = {root: [0.0, NEG_INF]}
+
+        t = 0
+        while t < num_frames:
+            if candidates[t] is None:
+                # Fold the whole run of near-certain blank frames into one step
+                end = t
+                while end < num_frames and candidates[end] is None:
+                    end += 1
+                blank_logp = float(blank_cumsum[end] - blank_cumsum[t])
+                beams = {node: [_logaddexp(p_b, p_nb) + blank_logp, NEG_INF] for node, (p_b, p_nb) in beams.items()}
+                t = end
+                continue
+
+            frame = log_probs[t]
+            blank_logp = float(frame[blank_id])
+            tokens = candidates[t].tolist()
+            token_logps = frame[tokens].tolist()
+            next_beams: Dict[_Prefix, List[float]] = {}
+            # Children already alive in the beam, so both ways of reaching
+            # a prefix merge into the same node
+            children = {(node.parent, node.token): node for node in beams}
+
+            for node, (p_b, p_nb) in beams.items():
+                total = _logaddexp(p_b, p_nb)
+                entry = next_beams.setdefault(node, [NEG_INF, NEG_INF])
+                entry[0] = _logaddexp(entry[0], total + blank_logp)
+
+                for token, token_logp in zip(tokens, token_logps):
+                    if token == node.token:
+                        # Repeat without a blank collapses into the same prefix;
+                        # only a path ending in blank starts a new character
+                        entry[1] = _logaddexp(entry[1], p_nb + token_logp)
+                        extend_logp = p_b + token_logp
+                    else:
+                        extend_logp = total + token_logp
+                    if extend_logp == NEG_INF:
+                        continue
+
+                    child = children.get((node, token))
+                    if child is None:
+                        child = self._extend(node, token, t)
+                        children[(node, token)] = child
+                    child_entry = next_beams.setdefault(child, [NEG_INF, NEG_INF])
+                    child_entry[1] = _logaddexp(child_entry[1], extend_logp)
+
+            beams = self._prune(next_beams)
+            t += 1
+
+        best = max(beams.items(), key=lambda item: self._final_score(item[0], item[1]))[0]
+        return self._frame_path(best.emissions(), log_probs)
+
+    def _prune(self, beams: Dict[_Prefix, List[float]]) -> Dict[_Prefix, List[float]]:
+        scored = sorted(
+            ((_logaddexp(p_b, p_nb) + node.lm_score, node) for node, (p_b, p_nb) in beams.items()),
+            key=lambda item: item[0], reverse=True
+        )[:self.beam_width]
+        floor = scored[0][0] + self.beam_prune_logp
+        return {node: beams[node] for score, node in scored if score >= floor}
+
+    def _final_score(self, node: _Prefix, probs: List[float]) -> float:
+        score = _logaddexp(*probs) + node.lm_score
+        if self.lm is not None:
+            state = node.lm_state
+            if node.word:
+                word_score, state = self._word_score(node)
+                score += word_score
+            score += self.alpha * self.lm.score_ln(state, "</s>")[0]
+        return score
+
+    def _frame_path(self, emissions: List[Tuple[int, int]], log_probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lay the emitted tokens out as a greedy-style frame path: each token
+        starts where it peaks rather than where its prefix was first created
+        and holds for as long as it stays the frame's argmax, so word timings match greedy
+        decoding wherever the two agree
+        """
+        num_frames = len(log_probs)
+        argmax = log_probs.argmax(axis=1)
+
+        # A prefix is created by its first, often faint, emission. Working
+        # backwards, start each token at the last run of frames where it is
+        # the argmax between its emission and the next token's start, if
+        # there is one; earlier runs of the same character belong to earlier
+        # occurrences of it
+        starts = [0] * len(emissions)
+        limit = num_frames
+        for i in range(len(emissions) - 1, -1, -1):
+            token, frame = emissions[i]
+            if i + 1 < len(emissions):
+                # a doubled character needs a blank in between
+                limit = starts[i + 1] - (emissions[i + 1][0] == token)
+            start = limit - 1
+            while start >= frame and argmax[start] != token:
+                start -= 1
+            while start > frame and argmax[start - 1] == token:
+                start -= 1
+            starts[i] = start if start >= frame else frame
+
+        path = np.full(num_frames, self.blank_id, dtype=np.int64)
+        for i, (token, _) in enumerate(emissions):
+            frame = starts[i]
+            next_frame = starts[i + 1] if i + 1 < len(emissions) else num_frames
+            if i + 1 < len(emissions) and emissions[i + 1][0] == token:
+                next_frame -= 1  # a doubled character needs a blank in between
+            end = frame + 1
+            while end < next_frame and argmax[end] == token:
+                end += 1
+            path[frame:end] = token
+        confidences = np.exp(log_probs[np.arange(num_frames), path])
+        return path, confidences.astype(np.float32)
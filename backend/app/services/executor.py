@@ -0,0 +1,92 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a bounded executor has no running slot or queue space left"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} executor is saturated")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard cap on running plus queued work.
+
+    At most `max_workers` calls run at once and at most `max_queue` more
+    wait for a slot; anything beyond that is rejected immediately with
+    ExecutorSaturated instead of piling up behind the event loop.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int,
+                 retry_after: int = settings.EXECUTOR_RETRY_AFTER_SECONDS):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker"""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._pending - self.max_workers, 0)
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn, raising ExecutorSaturated if the queue is full"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise ExecutorSaturated(self.name, self.retry_after)
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn on the pool and await its result without blocking the loop"""
+        future = self.submit(functools.partial(fn, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+
+
+# Model inference: deliberately small, the model already uses all cores
+inference_executor = BoundedExecutor(
+    "inference", settings.INFERENCE_CONCURRENCY, settings.INFERENCE_QUEUE_SIZE
+)
+
+# Batch transcription jobs; each one runs several files internally
+batch_executor = BoundedExecutor(
+    "batch", settings.BATCH_CONCURRENCY, settings.BATCH_QUEUE_SIZE
+)
+
+# Live stream decode steps: short windows that must not queue behind files
+stream_executor = BoundedExecutor(
+    "stream", settings.STREAM_CONCURRENCY, settings.STREAM_QUEUE_SIZE
+)
+
+# Short blocking calls from async routes (database queries, file writes)
+io_executor = BoundedExecutor(
+    "io", settings.IO_CONCURRENCY, settings.IO_QUEUE_SIZE
+)
@@ -0,0 +1,187 @@
+"""
+Selectable CPU inference backends for the Wav2Vec2 CTC model.
+
+    eager      plain PyTorch fp32
+    quantized  PyTorch with dynamic int8 quantisation of all Linear layers
+    onnx       exported ONNX graph run through ONNX Runtime
+
+The backend is chosen with ASR_BACKEND. The ONNX graph is exported once and
+cached under ASR_ONNX_DIR. Check a backend against eager mode with
+
+    python -m app.services.inference_backends parity path/to/audio.wav --backend onnx
+"""
+import argparse
+import os
+from typing import Optional
+import torch
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("eager", "quantized", "onnx")
+
+
+class EagerBackend:
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+
+    def __call__(self, input_values: torch.Tensor, attention_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        with torch.no_grad():
+            return self.model(input_values, attention_mask=attention_mask).logits
+
+
+class QuantizedBackend(EagerBackend):
+    """Dynamic int8 quantisation: weights are int8, activations quantised per call"""
+
+    def __init__(self, model, device):
+        if device.type != "cpu":
+            raise ValueError("Dynamic quantisation is only supported on CPU")
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized, device)
+
+
+class OnnxBackend:
+    def __init__(self, onnx_path: str, num_threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("ASR_BACKEND=onnx requires the onnxruntime package")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, input_values: torch.Tensor, attention_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        feeds = {"input_values": input_values.cpu().numpy()}
+        if "attention_mask" in self.input_names:
+            if attention_mask is None:
+                attention_mask = torch.ones_like(input_values, dtype=torch.long)
+            feeds["attention_mask"] = attention_mask.cpu().numpy().astype("int64")
+        return torch.from_numpy(self.session.run(["logits"], feeds)[0])
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap the HF model so the exported graph has a single tensor output"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_values, attention_mask):
+        return self.model(input_values, attention_mask=attention_mask).logits
+
+
+def onnx_path_for(model_name: str, revision: str) -> str:
+    """Cache location of the exported graph, one per model and revision"""
+    name = f"{model_name}@{revision}".replace("/", "__")
+    return os.path.join(settings.ASR_ONNX_DIR, name + ".onnx")
+
+
+def export_onnx(model, onnx_path: str, opset: int = 17) -> str:
+    """Export the CTC model to ONNX with dynamic batch and length axes"""
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    model = model.to("cpu").eval()
+    dummy = torch.zeros(1, 16000)
+    mask = torch.ones(1, 16000, dtype=torch.long)
+    tmp_path = onnx_path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (dummy, mask),
+            tmp_path,
+            input_names=["input_values", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_values": {0: "batch", 1: "samples"},
+                "attention_mask": {0: "batch", 1: "samples"},
+                "logits": {0: "batch", 1: "frames"},
+            },
+            opset_version=opset,
+        )
+    os.replace(tmp_path, onnx_path)
+    logger.info(f"Exported ONNX model to {onnx_path}")
+    return onnx_path
+
+
+def create_backend(name: str, model, device, model_name: str, revision: str):
+    """
+    Build the configured backend, exporting the ONNX graph on first use.
+    Only the eager backend keeps a reference to `model`.
+    """
+    if name == "eager":
+        return EagerBackend(model, device)
+    if name == "quantized":
+        return QuantizedBackend(model, device)
+    if name == "onnx":
+        onnx_path = onnx_path_for(model_name, revision)
+        if not os.path.exists(onnx_path):
+            export_onnx(model, onnx_path)
+        return OnnxBackend(onnx_path)
+    raise ValueError(f"Unknown ASR_BACKEND: {name} (expected one of {', '.join(BACKENDS)})")
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = reference.split()
+    hyp = hypothesis.split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def check_parity(audio_path: str, backend: str) -> dict:
+    """Transcribe with eager mode and `backend` and compare the transcripts"""
+    import time
+    from app.services.asr import SomaliASR
+
+    results = {}
+    for name in ("eager", backend):
+        asr = SomaliASR(backend=name)
+        start = time.time()
+        results[name] = (asr.transcribe(audio_path)["text"], time.time() - start)
+        del asr
+
+    reference, eager_time = results["eager"]
+    candidate, backend_time = results[backend]
+    return {
+        "backend": backend,
+        "identical": reference == candidate,
+        "word_error_rate": word_error_rate(reference, candidate),
+        "eager_seconds": eager_time,
+        "backend_seconds": backend_time,
+        "speedup": eager_time / backend_time if backend_time else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ASR inference backend utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="export and cache the ONNX graph")
+    parity = sub.add_parser("parity", help="compare a backend's transcript against eager mode")
+    parity.add_argument("audio_path")
+    parity.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from transformers import Wav2Vec2ForCTC
+        model = Wav2Vec2ForCTC.from_pretrained(settings.ASR_MODEL_NAME, revision=settings.ASR_MODEL_REVISION)
+        print(export_onnx(model, onnx_path_for(settings.ASR_MODEL_NAME, settings.ASR_MODEL_REVISION)))
+    else:
+        print(check_parity(args.audio_path, args.backend))
+
+
+if __name__ == "__main__":
+    main()
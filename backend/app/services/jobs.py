@@ -0,0 +1,325 @@
+import enum
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import logging
+
+from app.core.config import settings
+from app.crud import media as media_crud
+from app.services.executor import batch_executor, inference_executor, ExecutorSaturated
+from app.services.metrics import job_outcomes, observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class InMemoryJobStore:
+    """Process-local stand-in for the Redis job store"""
+
+    def __init__(self, ttl_seconds: int = settings.JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [k for k, v in self._jobs.items() if v["updated_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def create(self, job: Dict):
+        with self._lock:
+            self._expire()
+            self._jobs[job["job_id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields, updated_at=time.time())
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+class RedisJobStore:
+    """Job store shared between the API and Celery workers"""
+
+    def __init__(self, url: str = settings.REDIS_URL, ttl_seconds: int = settings.JOB_TTL_SECONDS):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"transcription_job:{job_id}"
+
+    def create(self, job: Dict):
+        self.client.set(self._key(job["job_id"]), json.dumps(job), ex=self.ttl_seconds)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        raw = self.client.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    def update(self, job_id: str, **fields):
+        # Each job is only ever written by the one worker running it, so a
+        # read-modify-write is safe here
+        job = self.get(job_id)
+        if job:
+            job.update(fields, updated_at=time.time())
+            self.client.set(self._key(job_id), json.dumps(job), ex=self.ttl_seconds)
+
+    def delete(self, job_id: str):
+        self.client.delete(self._key(job_id))
+
+
+class JobManager:
+    """
+    Queue transcriptions and track their progress.
+
+    With the "local" backend jobs run on the bounded inference executor
+    (batch jobs on the batch executor), which is what tests and single-node
+    setups use. With "celery" they are
+    dispatched to Celery workers (see app/worker.py) and state lives in Redis.
+    """
+
+    def __init__(self, backend: str = settings.JOB_BACKEND):
+        self.backend = backend
+        if backend == "celery":
+            self.store = RedisJobStore()
+        elif backend == "local":
+            self.store = InMemoryJobStore()
+        else:
+            raise ValueError(f"Unknown JOB_BACKEND: {backend}")
+
+    def submit(self, db, media_file, user_id: int) -> Dict:
+        """
+        Register a job, mark the media file as queued and dispatch it.
+
+        Raises ExecutorSaturated if the local worker queue is full, in which
+        case the media file keeps its previous status.
+        """
+        now = time.time()
+        previous_status = media_file.status
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "media_file_id": media_file.id,
+            "user_id": user_id,
+            "status": JobStatus.QUEUED.value,
+            "progress": 0.0,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.create(job)
+        media_crud.update_media_file(db, media_file.id, {"status": JobStatus.QUEUED.value})
+
+        if self.backend == "celery":
+            from app.worker import transcribe_job
+            transcribe_job.delay(job["job_id"])
+        else:
+            try:
+                inference_executor.submit(self.run_job, job["job_id"])
+            except ExecutorSaturated:
+                self.store.delete(job["job_id"])
+                media_crud.update_media_file(db, media_file.id, {"status": previous_status})
+                job_outcomes["rejected"].inc()
+                raise
+
+        job_outcomes["queued"].inc()
+        return job
+
+    def submit_batch(self, db, items: List[Dict], media_files: List, user_id: int) -> Dict:
+        """
+        Register one job for a whole batch and dispatch it to the batch queue.
+
+        items are the per-file entries reported back in request order (those
+        already marked invalid never run); media_files are the owned files,
+        transcribed in the given order. Raises ExecutorSaturated if the batch
+        queue is full, in which case every file keeps its previous status.
+        """
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": "batch",
+            "user_id": user_id,
+            "status": JobStatus.QUEUED.value,
+            "progress": 0.0,
+            "error": None,
+            "items": items,
+            "run_order": [media_file.id for media_file in media_files],
+            "created_at": now,
+            "updated_at": now,
+        }
+        job.update(_batch_counts(items))
+        previous_statuses: Dict[str, List[int]] = {}
+        for media_file in media_files:
+            previous_statuses.setdefault(media_file.status, []).append(media_file.id)
+        self.store.create(job)
+        media_crud.update_media_status(db, job["run_order"], JobStatus.QUEUED.value)
+
+        if self.backend == "celery":
+            from app.worker import transcribe_batch_job
+            transcribe_batch_job.delay(job["job_id"])
+        else:
+            try:
+                batch_executor.submit(self.run_batch_job, job["job_id"])
+            except ExecutorSaturated:
+                self.store.delete(job["job_id"])
+                for status, media_ids in previous_statuses.items():
+                    media_crud.update_media_status(db, media_ids, status)
+                job_outcomes["rejected"].inc()
+                raise
+
+        job_outcomes["queued"].inc()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def run_job(self, job_id: str):
+        """Execute a queued job; called by the worker pool or a Celery task"""
+        from app.db.database import SessionLocal
+        from app.services.transcription import transcription_service
+
+        job = self.store.get(job_id)
+        if job is None:
+            logger.warning(f"Transcription job {job_id} not found")
+            return
+
+        self.store.update(job_id, status=JobStatus.PROCESSING.value)
+        observe_stage("queue_wait", max(time.time() - job["created_at"], 0.0))
+
+        def report_progress(fraction: float):
+            self.store.update(job_id, progress=round(fraction * 100, 1))
+
+        db = SessionLocal()
+        try:
+            result = transcription_service.transcribe_media(
+                db, job["media_file_id"], job["user_id"], progress_callback=report_progress
+            )
+            self.store.update(
+                job_id,
+                status=JobStatus.COMPLETED.value,
+                progress=100.0,
+                result={
+                    "transcript_id": result["transcript_id"],
+                    "processing_time": result["processing_time"],
+                },
+            )
+            job_outcomes["completed"].inc()
+        except Exception as e:
+            logger.error(f"Transcription job {job_id} failed: {e}")
+            self.store.update(job_id, status=JobStatus.FAILED.value, error=str(e))
+            job_outcomes["failed"].inc()
+        finally:
+            db.close()
+
+    def run_batch_job(self, job_id: str):
+        """
+        Execute a queued batch job. BATCH_TRANSCRIBE_FILE_CONCURRENCY files
+        run at a time, each with its own session, and all of them submit
+        windows to the shared micro-batch scheduler, so forward passes stay
+        full. A failing file is marked failed and the others carry on.
+        """
+        from app.db.database import SessionLocal
+        from app.services.transcription import transcription_service
+
+        job = self.store.get(job_id)
+        if job is None:
+            logger.warning(f"Batch transcription job {job_id} not found")
+            return
+
+        self.store.update(job_id, status=JobStatus.PROCESSING.value)
+        observe_stage("queue_wait", max(time.time() - job["created_at"], 0.0))
+        items = {item["media_id"]: item for item in job["items"]}
+        # Only this job writes its record, and only under this lock, so the
+        # Redis store's read-modify-write stays safe across file threads
+        lock = threading.Lock()
+
+        def publish(**fields):
+            runnable = [item for item in job["items"] if item["status"] != "invalid"]
+            progress = sum(item["progress"] for item in runnable) / len(runnable) if runnable else 100.0
+            self.store.update(
+                job_id, items=job["items"], progress=round(progress, 1), **_batch_counts(job["items"]), **fields
+            )
+
+        def transcribe(media_id: int):
+            item = items[media_id]
+            with lock:
+                item["status"] = JobStatus.PROCESSING.value
+                publish()
+
+            def report_progress(fraction: float):
+                progress = round(fraction * 100, 1)
+                with lock:
+                    # Whole percents are plenty for polling clients
+                    if progress - item["progress"] >= 1.0:
+                        item["progress"] = progress
+                        publish()
+
+            db = SessionLocal()
+            try:
+                result = transcription_service.transcribe_media(
+                    db, media_id, job["user_id"], progress_callback=report_progress
+                )
+                update = {
+                    "status": JobStatus.COMPLETED.value,
+                    "progress": 100.0,
+                    "transcript_id": result["transcript_id"],
+                }
+            except Exception as e:
+                logger.error(f"Batch {job_id}: transcription of media file {media_id} failed: {e}")
+                update = {"status": JobStatus.FAILED.value, "error": str(e)}
+            finally:
+                db.close()
+            with lock:
+                item.update(update)
+                publish()
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=settings.BATCH_TRANSCRIBE_FILE_CONCURRENCY, thread_name_prefix="batch-file"
+            ) as pool:
+                list(pool.map(transcribe, job["run_order"]))
+            with lock:
+                publish(status=JobStatus.COMPLETED.value)
+            job_outcomes["completed"].inc()
+        except Exception as e:
+            logger.error(f"Batch transcription job {job_id} failed: {e}")
+            self.store.update(job_id, status=JobStatus.FAILED.value, error=str(e))
+            job_outcomes["failed"].inc()
+
+
+def _batch_counts(items: List[Dict]) -> Dict[str, int]:
+    """Number of batch items in each status"""
+    counts = {status: 0 for status in ("queued", "processing", "completed", "failed", "invalid")}
+    for item in items:
+        counts[item["status"]] += 1
+    return counts
+
+
+# Global instance
+job_manager = None
+
+def get_job_manager() -> JobManager:
+    """Get singleton job manager (lazy so Redis is only contacted when used)"""
+    global job_manager
+    if job_manager is None:
+        job_manager = JobManager()
+    return job_manager
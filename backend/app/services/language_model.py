@@ -0,0 +1,130 @@
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOG10 = math.log(10)
+BITS_PER_WORD = 24  # n-gram keys pack one word id per 24 bits
+UNKNOWN_LOG10_PROB = -10.0  # used when the model has no <unk> entry
+
+State = Tuple[int, ...]
+
+
+class NgramLanguageModel:
+    """
+    Backoff n-gram model read from an ARPA file (as written by KenLM's lmplz).
+
+    Words are interned to integer ids and every n-gram is packed into one
+    integer key, so the index is a dict of ints into two float32 arrays
+    (log10 probability and backoff weight) rather than tuples of strings.
+    A state is the tuple of context word ids that matters for the next
+    word; score() is memoised on (state, word), which decoding hits
+    constantly because beams share their recent history.
+    """
+
+    def __init__(self, order: int, vocab: Dict[str, int], index: Dict[int, int],
+                 log_probs: np.ndarray, backoffs: np.ndarray, cache_size: int = 1 << 18):
+        self.order = order
+        self.vocab = vocab
+        self.index = index
+        self.log_probs = log_probs
+        self.backoffs = backoffs
+        self.unk_id = vocab.get("<unk>")
+        self.score = lru_cache(maxsize=cache_size)(self._score)
+
+    @classmethod
+    def from_arpa(cls, path: str) -> "NgramLanguageModel":
+        vocab: Dict[str, int] = {}
+        index: Dict[int, int] = {}
+        log_probs: List[float] = []
+        backoffs: List[float] = []
+        order = 0
+        current = 0
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("ngram ") or line in ("\\data\\", "\\end\\"):
+                    continue
+                if line.startswith("\\") and line.endswith("-grams:"):
+                    current = int(line[1:line.index("-")])
+                    order = max(order, current)
+                    continue
+                if current == 0:
+                    continue
+
+                fields = line.split("\t") if "\t" in line else line.split()
+                if "\t" in line:
+                    words = fields[1].split()
+                    backoff = float(fields[2]) if len(fields) > 2 else 0.0
+                else:
+                    words = fields[1:1 + current]
+                    backoff = float(fields[1 + current]) if len(fields) > 1 + current else 0.0
+
+                ids = []
+                for word in words:
+                    if word not in vocab:
+                        vocab[word] = len(vocab)
+                    ids.append(vocab[word])
+                index[_pack(ids)] = len(log_probs)
+                log_probs.append(float(fields[0]))
+                backoffs.append(backoff)
+
+        if order == 0:
+            raise ValueError(f"No n-grams found in {path}")
+        if len(vocab) >= 1 << BITS_PER_WORD:
+            raise ValueError(f"{path} has too many words ({len(vocab)})")
+        logger.info(f"Loaded {order}-gram LM with {len(vocab)} words and {len(log_probs)} n-grams from {path}")
+        return cls(order, vocab, index, np.asarray(log_probs, dtype=np.float32),
+                   np.asarray(backoffs, dtype=np.float32))
+
+    def begin_state(self) -> State:
+        start = self.vocab.get("<s>")
+        return () if start is None else (start,)
+
+    def _score(self, state: State, word: str) -> Tuple[float, State]:
+        """(log10 P(word | state), next state), backing off to shorter contexts"""
+        word_id = self.vocab.get(word, self.unk_id)
+        if word_id is None:
+            return UNKNOWN_LOG10_PROB, ()
+
+        penalty = 0.0
+        context = state
+        while True:
+            row = self.index.get(_pack(context + (word_id,)))
+            if row is not None:
+                log_prob = penalty + float(self.log_probs[row])
+                break
+            if not context:
+                return UNKNOWN_LOG10_PROB, ()
+            row = self.index.get(_pack(context))
+            if row is not None:
+                penalty += float(self.backoffs[row])
+            context = context[1:]
+
+        # Keep the longest suffix that can still be extended
+        history = (state + (word_id,))[-(self.order - 1):] if self.order > 1 else ()
+        while history and _pack(history) not in self.index:
+            history = history[1:]
+        return log_prob, history
+
+    def score_ln(self, state: State, word: str) -> Tuple[float, State]:
+        """score() in natural log, the unit of CTC log-probabilities"""
+        log_prob, next_state = self.score(state, word)
+        return log_prob * LOG10, next_state
+
+
+def _pack(ids) -> int:
+    key = 0
+    for word_id in ids:
+        key = (key << BITS_PER_WORD) | (word_id + 1)
+    return key
+
+
+@lru_cache(maxsize=4)
+def load_language_model(path: str) -> NgramLanguageModel:
+    """Parse an ARPA file once per process"""
+    return NgramLanguageModel.from_arpa(path)
@@ -0,0 +1,167 @@
+"""
+Prometheus metrics for the transcription pipeline and the HTTP API.
+
+Label children are resolved once up front, so recording a sample is a lock
+and an add (a couple of microseconds) and instrumentation stays on in
+production. Set PROMETHEUS_MULTIPROC_DIR to an empty directory to aggregate samples
+from forked ASR workers, Celery workers and several API processes.
+"""
+import os
+import time
+from typing import Iterable, Iterator
+import numpy as np
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+STAGES = (
+    # SomaliASR.transcribe
+    "vad", "decode", "feature_extraction", "forward", "frame_posteriors", "ctc_decode", "alignment",
+    # TranscriptionService.transcribe_media and the job queue
+    "queue_wait", "cache_lookup", "audio_cache", "asr", "db_write", "total",
+)
+
+STAGE_SECONDS = Histogram(
+    "transcription_stage_seconds",
+    "Time spent in each stage of the transcription pipeline",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+stage_seconds = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+
+TRANSCRIPTIONS = Counter(
+    "transcriptions_total", "Transcriptions by outcome", ["outcome"],
+)
+transcription_outcomes = {outcome: TRANSCRIPTIONS.labels(outcome) for outcome in ("completed", "cached", "failed")}
+
+JOBS = Counter(
+    "transcription_jobs_total", "Background transcription jobs by outcome", ["outcome"],
+)
+job_outcomes = {outcome: JOBS.labels(outcome) for outcome in ("queued", "rejected", "completed", "failed")}
+
+VAD_SKIPPED_FRACTION = Histogram(
+    "vad_skipped_fraction",
+    "Fraction of each transcribed file that voice activity detection skipped",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0),
+)
+
+TRANSCRIPTIONS_IN_FLIGHT = Gauge(
+    "transcriptions_in_flight", "Transcriptions currently running", multiprocess_mode="livesum",
+)
+
+# Sampled when /metrics is scraped
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth", "Tasks waiting for a bounded executor slot", ["executor"], multiprocess_mode="livesum",
+)
+EXECUTOR_PENDING = Gauge(
+    "executor_pending", "Tasks running or queued on a bounded executor", ["executor"], multiprocess_mode="livesum",
+)
+BATCH_QUEUE_DEPTH = Gauge(
+    "asr_batch_queue_depth", "Windows waiting for the micro-batch scheduler", multiprocess_mode="livesum",
+)
+MODEL_LOADED = Gauge(
+    "asr_model_loaded", "1 once the ASR model is loaded in this process", multiprocess_mode="livemax",
+)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    stage_seconds[stage].observe(seconds)
+
+
+class timed_stage:
+    """Context manager that records the wrapped block under `stage`"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, stage: str):
+        self.histogram = stage_seconds[stage]
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def timed_blocks(blocks: Iterable[np.ndarray], stage: str) -> Iterator[np.ndarray]:
+    """
+    Pass a lazily produced block stream through, recording the total time
+    spent producing blocks (not consuming them) once it is exhausted
+    """
+    spent = 0.0
+    iterator = iter(blocks)
+    while True:
+        start = time.perf_counter()
+        block = next(iterator, None)
+        spent += time.perf_counter() - start
+        if block is None:
+            break
+        yield block
+    stage_seconds[stage].observe(spent)
+
+
+class HTTPMetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template, so
+    /media/{media_id} is one series however many ids are requested
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_LATENCY.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+def _sample_gauges():
+    from app.services import asr
+    from app.services.executor import batch_executor, inference_executor, io_executor, stream_executor
+
+    for executor in (inference_executor, batch_executor, stream_executor, io_executor):
+        EXECUTOR_QUEUE_DEPTH.labels(executor.name).set(executor.queue_depth)
+        EXECUTOR_PENDING.labels(executor.name).set(executor.pending)
+
+    model = asr.asr_model
+    MODEL_LOADED.set(0 if model is None else 1)
+    # The worker pool keeps its in-process model (and scheduler) as asr_model
+    batcher = getattr(getattr(model, "asr_model", model), "batcher", None)
+    BATCH_QUEUE_DEPTH.set(batcher.queue_depth if batcher is not None else 0)
+
+
+def render_metrics() -> bytes:
+    """Current metrics in the Prometheus text exposition format"""
+    _sample_gauges()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,201 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Files written for every profiled run
+ARTIFACTS = {
+    "cprofile.collapsed": "text/plain",
+    "cprofile.pstats": "application/octet-stream",
+    "torch_trace.json": "application/json",
+    "torch_ops.txt": "text/plain",
+    "meta.json": "application/json",
+}
+
+PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+_state = threading.local()
+# cProfile can only be active once per process on newer Pythons
+_profiling_lock = threading.Lock()
+
+
+def should_profile(requested: bool = False) -> bool:
+    """Whether to profile this transcription: on request or by sampling"""
+    return requested or (settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE)
+
+
+def is_active() -> bool:
+    """True while the current thread is inside a ProfileRun"""
+    return getattr(_state, "active", False)
+
+
+def _collapsed_stacks(stats: pstats.Stats, max_depth: int = 64, min_seconds: float = 1e-4) -> List[str]:
+    """
+    Flame-graph "collapsed" stacks (frame;frame;frame microseconds).
+
+    cProfile keeps only caller -> callee edges, not whole stacks, so stacks
+    are rebuilt from the roots down and each function's time is split
+    between its callers in proportion to the time spent on each edge.
+    """
+    entries = stats.stats
+    children = defaultdict(list)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, edge_cumtime) in callers.items():
+            children[caller].append((func, edge_cumtime))
+
+    def label(func) -> str:
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    lines: Dict[str, float] = defaultdict(float)
+
+    def walk(func, weight: float, path: List[str], on_path: set):
+        _, _, tottime, cumtime, _ = entries[func]
+        if cumtime <= 0 or weight < min_seconds:
+            return
+        scale = weight / cumtime
+        path = path + [label(func)]
+        lines[";".join(path)] += tottime * scale
+        if len(path) >= max_depth:
+            return
+        for child, edge_cumtime in children.get(func, ()):
+            if child not in on_path and child in entries:
+                walk(child, edge_cumtime * scale, path, on_path | {child})
+
+    for func, (_, _, _, cumtime, callers) in entries.items():
+        if not callers:
+            walk(func, cumtime, [], {func})
+
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in lines.items() if seconds * 1e6 >= 1]
+
+
+class ProfileRun:
+    """
+    Context manager running the enclosed code under cProfile and the torch
+    profiler, then writing the artifacts to PROFILE_DIR/<profile_id>/.
+    Obtain one with begin(), which holds the process-wide profiling lock
+    until the run exits.
+    """
+
+    def __init__(self, label: str, profile_dir: str = settings.PROFILE_DIR):
+        self.label = label
+        self.profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(profile_dir, self.profile_id)
+        self.profile_dir = profile_dir
+
+    def __enter__(self):
+        # begin() handed over the lock; give it back if the run never starts,
+        # since __exit__ (which normally releases it) won't be called
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile
+
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self._torch_profiler = profile(activities=activities)
+            self._cprofile = cProfile.Profile()
+            self._started = time.time()
+
+            _state.active = True
+            self._torch_profiler.__enter__()
+            try:
+                self._cprofile.enable()
+            except BaseException:
+                self._torch_profiler.__exit__(None, None, None)
+                raise
+        except BaseException:
+            _state.active = False
+            _profiling_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cprofile.disable()
+        self._torch_profiler.__exit__(exc_type, exc, tb)
+        _state.active = False
+        try:
+            self._write(error=None if exc is None else str(exc))
+        except Exception as e:
+            logger.warning(f"Could not write profile {self.profile_id}: {e}")
+        finally:
+            _profiling_lock.release()
+        return False
+
+    def _write(self, error: Optional[str]):
+        os.makedirs(self.path, exist_ok=True)
+        self._cprofile.dump_stats(os.path.join(self.path, "cprofile.pstats"))
+        stats = pstats.Stats(self._cprofile)
+        with open(os.path.join(self.path, "cprofile.collapsed"), "w") as f:
+            f.write("\n".join(_collapsed_stacks(stats)) + "\n")
+
+        self._torch_profiler.export_chrome_trace(os.path.join(self.path, "torch_trace.json"))
+        with open(os.path.join(self.path, "torch_ops.txt"), "w") as f:
+            f.write(self._torch_profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=50))
+
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({
+                "profile_id": self.profile_id,
+                "label": self.label,
+                "started_at": self._started,
+                "wall_seconds": round(time.time() - self._started, 3),
+                "error": error,
+            }, f)
+        logger.info(f"Wrote profile {self.profile_id} for {self.label}")
+        prune_profiles(self.profile_dir)
+
+
+def begin(label: str) -> Optional[ProfileRun]:
+    """
+    A ProfileRun to enter right away, or None if another run is in progress
+    (the caller then proceeds unprofiled)
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        logger.info(f"Skipping profile of {label}: another profile is running")
+        return None
+    try:
+        return ProfileRun(label)
+    except BaseException:
+        _profiling_lock.release()
+        raise
+
+
+def prune_profiles(profile_dir: str = settings.PROFILE_DIR, keep: int = settings.PROFILE_MAX_RUNS):
+    """Delete all but the newest `keep` profile runs"""
+    runs = sorted(name for name in os.listdir(profile_dir) if PROFILE_ID.match(name))
+    for name in runs[:max(len(runs) - keep, 0)]:
+        shutil.rmtree(os.path.join(profile_dir, name), ignore_errors=True)
+
+
+def list_profiles(profile_dir: str = settings.PROFILE_DIR) -> List[Dict]:
+    """Metadata of the stored profile runs, newest first"""
+    if not os.path.isdir(profile_dir):
+        return []
+    runs = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        meta_path = os.path.join(profile_dir, name, "meta.json")
+        if PROFILE_ID.match(name) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                runs.append(json.load(f))
+    return runs
+
+
+def artifact_path(profile_id: str, artifact: str, profile_dir: str = settings.PROFILE_DIR) -> Optional[str]:
+    """Path of one artifact of a run, or None; ids and names are whitelisted"""
+    if not PROFILE_ID.match(profile_id) or artifact not in ARTIFACTS:
+        return None
+    path = os.path.join(profile_dir, profile_id, artifact)
+    return path if os.path.exists(path) else None
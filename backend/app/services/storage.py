@@ -0,0 +1,201 @@
+import os
+import re
+import uuid
+import logging
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Blob keys are sha256 content hashes (32-digit xxh3-128 keys from older
+# uploads are still accepted), so they can never name a path outside the store
+BLOB_KEY = re.compile(r"^[0-9a-f]{32}([0-9a-f]{32})?$")
+
+
+def _check_key(key: str) -> str:
+    if not BLOB_KEY.match(key or ""):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return key
+
+
+def shard_path(key: str) -> str:
+    """Relative location of a blob: ab/cd/abcd..., 65536 directories of a few blobs each"""
+    _check_key(key)
+    return os.path.join(key[:2], key[2:4], key)
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blobs on the local filesystem, sharded by the first
+    two bytes of the hash. Uploads are streamed to a temporary file under
+    the same root and renamed into place, so readers never see a partial
+    blob. A blob that already exists is never rewritten.
+    """
+
+    def __init__(self, root: str = settings.STORAGE_DIR):
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def temp_path(self) -> str:
+        """A fresh path to stream an upload into before put()"""
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    def put(self, temp_path: str, key: str):
+        path = os.path.join(self.root, shard_path(key))
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.root, shard_path(key)))
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, shard_path(key))
+
+    def location(self, key: str) -> str:
+        return self.local_path(key)
+
+    def delete(self, key: str):
+        try:
+            os.remove(os.path.join(self.root, shard_path(key)))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore:
+    """
+    Blobs in an S3-compatible bucket (AWS, MinIO, ...) under the same
+    sharded keys. Decoders need a real file, so blobs are downloaded on
+    first use into a local LocalBlobStore that acts as a read cache. The
+    cache is evicted least-recently-used (by mtime, refreshed on every
+    access) once it exceeds cache_max_bytes.
+    """
+
+    def __init__(self, bucket: str = settings.STORAGE_S3_BUCKET, prefix: str = settings.STORAGE_S3_PREFIX,
+                 endpoint_url: str = settings.STORAGE_S3_ENDPOINT_URL, cache_dir: str = settings.STORAGE_CACHE_DIR,
+                 cache_max_bytes: int = settings.STORAGE_CACHE_MAX_BYTES):
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("STORAGE_BACKEND=s3 requires the boto3 package")
+        if not bucket:
+            raise ValueError("STORAGE_S3_BUCKET must be set for the s3 storage backend")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache = LocalBlobStore(cache_dir)
+        self.cache_max_bytes = cache_max_bytes
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + shard_path(key).replace(os.sep, "/")
+
+    def temp_path(self) -> str:
+        return self.cache.temp_path()
+
+    def put(self, temp_path: str, key: str):
+        if self.exists(key):
+            # Leave the stored object alone; it is fetched on first use
+            os.remove(temp_path)
+            return
+        self.client.upload_file(temp_path, self.bucket, self._object_key(key))
+        # Keep the bytes we just uploaded as the local copy
+        self.cache.put(temp_path, key)
+        self.evict(keep=self.cache.local_path(key))
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def local_path(self, key: str) -> str:
+        path = self.cache.local_path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        temp_path = self.cache.temp_path()
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), temp_path)
+            self.cache.put(temp_path, key)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used cached blobs until the cache fits its budget"""
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.cache.root):
+            if dirpath == self.cache.root:
+                dirnames[:] = [d for d in dirnames if d != ".tmp"]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} blobs from the local storage cache")
+        return removed
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        self.cache.delete(key)
+
+
+_store = None
+
+
+def get_storage():
+    """
+    Blob store selected by STORAGE_BACKEND ("local" or "s3"). Stores
+    provide temp_path(), put(temp_path, key), exists(key), local_path(key),
+    location(key) and delete(key); keys are content hashes.
+    """
+    global _store
+    if _store is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _store = S3BlobStore()
+        elif settings.STORAGE_BACKEND == "local":
+            _store = LocalBlobStore()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+    return _store
+
+
+def media_local_path(media_file) -> str:
+    """
+    Readable local path of a media file's bytes. Files uploaded before
+    content-addressed storage keep their original file_path.
+    """
+    if media_file.storage_key:
+        return get_storage().local_path(media_file.storage_key)
+    return media_file.file_path
@@ -0,0 +1,148 @@
+from typing import Dict, List, Optional
+import numpy as np
+import soxr
+import torch
+import logging
+
+from app.core.config import settings
+from app.services.alignment import align_words
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a live 16 kHz audio stream.
+
+    Audio is appended to a rolling buffer. Every STREAM_STEP_S of new audio
+    the uncommitted part of the buffer (plus a little left context) is run
+    through the model; words that end more than STREAM_STABILITY_MARGIN_S
+    before the live edge are finalised once STREAM_COMMIT_S of audio is
+    pending, everything after them is reported as a partial hypothesis.
+    Finalised audio is dropped from the buffer, so memory stays bounded by
+    STREAM_MAX_BUFFER_S however long the stream runs, even when decoding
+    falls behind: add_audio() then drops the oldest audio, finalising the
+    words last reported for it.
+    """
+
+    def __init__(self, asr_model, sample_rate: int = SAMPLE_RATE):
+        # The worker pool keeps an in-process copy of the model for this
+        self.asr = getattr(asr_model, "asr_model", asr_model)
+        self.resampler = None
+        if sample_rate != SAMPLE_RATE:
+            self.resampler = soxr.ResampleStream(sample_rate, SAMPLE_RATE, 1, dtype="float32")
+        self.step = int(settings.STREAM_STEP_S * SAMPLE_RATE)
+        self.commit_after = int(settings.STREAM_COMMIT_S * SAMPLE_RATE)
+        self.max_buffer = int(settings.STREAM_MAX_BUFFER_S * SAMPLE_RATE)
+        self.left_context = int(settings.STREAM_LEFT_CONTEXT_S * SAMPLE_RATE)
+        self.margin = int(settings.STREAM_STABILITY_MARGIN_S * SAMPLE_RATE)
+
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0  # absolute sample index of audio[0]
+        self.committed = 0  # absolute sample up to which words are final
+        self.last_decoded_end = 0
+        self.partial: List[Dict] = []  # words of the latest decode not yet final
+        self.forced_final: List[Dict] = []  # finalised by add_audio, not yet reported
+        self.dropped = 0  # undecoded samples discarded since the last decode
+
+    @property
+    def buffer_end(self) -> int:
+        return self.buffer_start + len(self.audio)
+
+    def add_audio(self, samples: np.ndarray):
+        samples = samples.astype(np.float32, copy=False)
+        if self.resampler is not None:
+            samples = self.resampler.resample_chunk(samples)
+        self.audio = np.concatenate([self.audio, samples])
+
+        overflow = len(self.audio) - self.max_buffer
+        if overflow > 0:
+            # Decoding fell behind (e.g. the executor was saturated): give up
+            # on the oldest audio rather than letting the buffer grow
+            until = self.buffer_start + overflow + self.left_context
+            self.dropped += overflow
+            cut = [w for w in self.partial if w["start"] * SAMPLE_RATE < until]
+            self.forced_final.extend(cut)
+            self.partial = self.partial[len(cut):]
+            self._commit(until)
+
+    def due(self) -> bool:
+        return self.buffer_end - self.last_decoded_end >= self.step
+
+    def _decode(self) -> List[Dict]:
+        """Word segments (absolute times) for the audio after `committed`"""
+        self.last_decoded_end = self.buffer_end
+        if len(self.audio) < self.asr.frame_stride * 2:
+            return []
+
+        # Straight to the model, not through the batch scheduler, so a live
+        # step never waits behind a batch of long file windows
+        logits = self.asr._forward(self.audio)
+        confidences, ids = torch.softmax(logits, dim=-1).max(dim=-1)
+        drop = int(round((self.committed - self.buffer_start) / self.asr.frame_stride))
+        offset = (self.buffer_start + drop * self.asr.frame_stride) / SAMPLE_RATE
+        return align_words(
+            ids.cpu().numpy()[drop:],
+            confidences.cpu().numpy()[drop:],
+            tokens=self.asr.tokens,
+            blank_id=self.asr.blank_id,
+            delimiter_id=self.asr.delimiter_id,
+            frame_duration=self.asr.frame_stride / SAMPLE_RATE,
+            time_map=lambda t: t + offset,
+        )
+
+    def _commit(self, until: int):
+        """Mark audio before `until` final and drop all but the left context"""
+        self.committed = max(self.committed, until)
+        keep_from = max(self.committed - self.left_context, self.buffer_start)
+        self.audio = self.audio[keep_from - self.buffer_start:].copy()
+        self.buffer_start = keep_from
+
+    def process(self) -> Dict:
+        """Decode the pending audio and return final and partial words"""
+        if self.dropped:
+            logger.warning(f"Streaming buffer full, dropped {self.dropped / SAMPLE_RATE:.2f}s of undecoded audio")
+            self.dropped = 0
+        words = self._decode()
+        final, self.forced_final = self.forced_final, []
+        pending = self.buffer_end - self.committed
+
+        if pending >= self.commit_after:
+            stable_before = (self.buffer_end - self.margin) / SAMPLE_RATE
+            stable = [w for w in words if w["end"] <= stable_before]
+            if stable:
+                self._commit(int(stable[-1]["end"] * SAMPLE_RATE))
+                words = words[len(stable):]
+            elif pending >= self.max_buffer - self.left_context - self.step:
+                # Nothing stable (silence or one endless word): force progress,
+                # finalising whatever was heard before the cut. A step early,
+                # so a stream that keeps up never reaches the add_audio() cap
+                cut = self.buffer_end - self.margin
+                stable = [w for w in words if w["start"] * SAMPLE_RATE < cut]
+                if stable:
+                    cut = min(max(cut, int(stable[-1]["end"] * SAMPLE_RATE)), self.buffer_end)
+                    words = words[len(stable):]
+                self._commit(cut)
+            final += stable
+
+        self.partial = words
+        return {"final": final, "partial": words}
+
+    def finish(self) -> Dict:
+        """Finalise everything still pending at the end of the stream"""
+        if self.resampler is not None:
+            self.audio = np.concatenate([self.audio, self.resampler.resample_chunk(np.zeros(0, np.float32), last=True)])
+        words = self._decode() if self.buffer_end > self.committed else []
+        self._commit(self.buffer_end)
+        final, self.forced_final, self.partial = self.forced_final + words, [], []
+        return {"final": final, "partial": []}
+
+
+def pcm_to_float(payload: bytes, sample_format: str) -> np.ndarray:
+    if sample_format == "s16le":
+        return np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_format == "f32le":
+        return np.frombuffer(payload, dtype="<f4")
+    raise ValueError(f"Unsupported sample format: {sample_format}")
@@ -0,0 +1,84 @@
+from typing import Iterable, Iterator, List, Tuple
+import hashlib
+
+from app.core.config import settings
+
+# (start, end, text) of one word or one cue
+Timed = Tuple[float, float, str]
+
+FORMATS = {
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+}
+
+
+def group_cues(
+    words: Iterable[Timed],
+    max_chars: int = settings.SUBTITLE_MAX_CHARS,
+    max_duration: float = settings.SUBTITLE_MAX_DURATION_S,
+    max_gap: float = settings.SUBTITLE_MAX_GAP_S,
+) -> Iterator[Timed]:
+    """
+    Group time-ordered words into subtitle cues.
+
+    A cue is closed when the next word would make it longer than max_chars
+    or max_duration, or when there is a pause of more than max_gap before
+    the next word. Cues are yielded as soon as they close.
+    """
+    text: List[str] = []
+    length = 0
+    cue_start = cue_end = 0.0
+
+    for start, end, word in words:
+        if not word:
+            continue
+        if text and (
+            length + 1 + len(word) > max_chars
+            or end - cue_start > max_duration
+            or start - cue_end > max_gap
+        ):
+            yield cue_start, cue_end, " ".join(text)
+            text = []
+        if not text:
+            cue_start = start
+            length = len(word)
+        else:
+            length += 1 + len(word)
+        text.append(word)
+        cue_end = end
+
+    if text:
+        yield cue_start, cue_end, " ".join(text)
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def render(cues: Iterable[Timed], fmt: str) -> Iterator[bytes]:
+    """Encode cues as SRT or WebVTT, one chunk per cue"""
+    separator = "," if fmt == "srt" else "."
+    if fmt == "vtt":
+        yield b"WEBVTT\n\n"
+    for index, (start, end, text) in enumerate(cues, 1):
+        timing = f"{_timestamp(start, separator)} --> {_timestamp(end, separator)}"
+        if fmt == "srt":
+            yield f"{index}\n{timing}\n{text}\n\n".encode("utf-8")
+        else:
+            yield f"{timing}\n{text}\n\n".encode("utf-8")
+
+
+def subtitle_etag(transcript_id: int, fmt: str) -> str:
+    """
+    Strong ETag for a transcript's subtitles.
+
+    Transcripts and their segments are never modified after creation, so
+    the transcript id plus the format and grouping settings identify the
+    exact bytes without having to render them.
+    """
+    key = f"{transcript_id}:{fmt}:{settings.SUBTITLE_MAX_CHARS}:{settings.SUBTITLE_MAX_DURATION_S}:{settings.SUBTITLE_MAX_GAP_S}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Dict, Optional
+import xxhash
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import logging
+
+from app.core.config import settings
+from app.crud import transcript_cache as cache_crud
+
+logger = logging.getLogger(__name__)
+
+
+def model_key() -> str:
+    """Identifies the exact weights and inference engine producing transcripts"""
+    return f"{settings.ASR_MODEL_NAME}@{settings.ASR_MODEL_REVISION}:{settings.ASR_BACKEND}"
+
+
+def _file_version(path: str) -> Optional[list]:
+    """(size, mtime) of a file, so replacing it changes the config key"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def config_key() -> str:
+    """Stable digest of every setting that can change the decoded output"""
+    config = {
+        "chunk_length_s": settings.ASR_CHUNK_LENGTH_S,
+        "chunk_stride_s": settings.ASR_CHUNK_STRIDE_S,
+        "vad": [
+            settings.VAD_ENERGY_THRESHOLD_DB,
+            settings.VAD_FLATNESS_THRESHOLD,
+            settings.VAD_MIN_SPEECH_MS,
+            settings.VAD_MIN_SILENCE_MS,
+            settings.VAD_PADDING_MS,
+        ] if settings.VAD_ENABLED else None,
+        "decoder": settings.ASR_DECODER,
+        "beam": [
+            settings.ASR_BEAM_WIDTH,
+            settings.ASR_BEAM_TOKEN_MIN_LOGP,
+            settings.ASR_BEAM_BLANK_SKIP_PROB,
+            settings.ASR_BEAM_PRUNE_LOGP,
+        ] if settings.ASR_DECODER == "beam" else None,
+        "lm": [
+            settings.ASR_LM_PATH,
+            _file_version(settings.ASR_LM_PATH),
+            settings.ASR_LM_ALPHA,
+            settings.ASR_LM_BETA,
+        ] if settings.ASR_DECODER == "beam" and settings.ASR_LM_PATH else None,
+    }
+    return xxhash.xxh3_64_hexdigest(json.dumps(config, sort_keys=True).encode())
+
+
+class TranscriptCache:
+    """
+    Content-addressed cache of transcription results.
+
+    Entries are keyed by (audio content hash, model key, decoding config key)
+    and live in the database so every API process and worker shares them.
+    The least recently used entries are evicted once the cache grows past
+    TRANSCRIPT_CACHE_MAX_ENTRIES, and entries for any other model can be
+    dropped with invalidate_stale() after a model upgrade.
+    """
+
+    def __init__(self, max_entries: int = settings.TRANSCRIPT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+    def get(self, db: Session, content_hash: Optional[str]) -> Optional[Dict]:
+        """Return a cached ASR result in SomaliASR.transcribe format, or None"""
+        if not content_hash:
+            return None
+        entry = cache_crud.get_cache_entry(db, content_hash, model_key(), config_key())
+        if entry is None:
+            return None
+        cache_crud.touch_cache_entry(db, entry)
+        return {
+            "text": entry.text,
+            "segments": json.loads(entry.segments),
+            "language": entry.language_code,
+        }
+
+    def put(self, db: Session, content_hash: Optional[str], result: Dict):
+        if not content_hash:
+            return
+        try:
+            cache_crud.create_cache_entry(
+                db,
+                content_hash=content_hash,
+                model_key=model_key(),
+                config_key=config_key(),
+                text=result["text"],
+                segments=json.dumps(result["segments"]),
+                language_code=result["language"],
+            )
+        except IntegrityError:
+            # A concurrent transcription of the same audio got there first
+            db.rollback()
+            return
+        self.evict(db)
+
+    def evict(self, db: Session) -> int:
+        """Drop least recently used entries beyond the size budget"""
+        excess = cache_crud.count_cache_entries(db) - self.max_entries
+        if excess <= 0:
+            return 0
+        return cache_crud.delete_least_recently_used(db, excess)
+
+    def invalidate_stale(self, db: Session) -> int:
+        """Remove entries produced by any model other than the configured one"""
+        deleted = cache_crud.delete_entries_not_for_model(db, model_key())
+        if deleted:
+            logger.info(f"Invalidated {deleted} transcript cache entries from previous models")
+        return deleted
+
+
+transcript_cache = TranscriptCache()
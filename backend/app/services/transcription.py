@@ -3,6 +3,14 @@ from app.services.asr import get_asr_model
 from app.crud import media as media_crud, transcript as transcript_crud
 from app.schemas.transcript import TranscriptCreate
 from app.models import MediaFile
+from app.core.config import settings
+from app.services.transcript_cache import transcript_cache
+from app.services.audio_cache import audio_cache
+from app.services.storage import media_local_path
+from app.services import profiling
+from app.services.metrics import (
+    TRANSCRIPTIONS_IN_FLIGHT, VAD_SKIPPED_FRACTION, observe_stage, timed_stage, transcription_outcomes,
+)
 import logging
 import time
 
@@ -20,10 +28,27 @@ class TranscriptionService:
             self.asr_model = get_asr_model()
         return self.asr_model
 
-    def transcribe_media(self, db: Session, media_file_id: int, user_id: int) -> dict:
+    def transcribe_media(self, db: Session, media_file_id: int, user_id: int, progress_callback=None,
+                         profile: bool = False) -> dict:
         """
         Transcribe a media file and save results to database
+
+        progress_callback is forwarded to the ASR model and receives the
+        completed fraction of the audio after each inference window. With
+        profile (or when sampled by PROFILE_SAMPLE_RATE) the run is profiled
+        and the result carries the profile_id of its artifacts.
         """
+        run = profiling.begin(f"media_file {media_file_id}") if profiling.should_profile(profile) else None
+        if run is None:
+            return self._transcribe_media(db, media_file_id, user_id, progress_callback)
+        with run:
+            result = self._transcribe_media(db, media_file_id, user_id, progress_callback)
+        result["profile_id"] = run.profile_id
+        return result
+
+    def _transcribe_media(self, db: Session, media_file_id: int, user_id: int, progress_callback=None) -> dict:
+        TRANSCRIPTIONS_IN_FLIGHT.inc()
+        started = time.perf_counter()
         try:
             # Get media file
             media_file = media_crud.get_media_file(db, media_file_id)
@@ -37,11 +62,39 @@ class TranscriptionService:
             # Update status to processing
             media_crud.update_media_file(db, media_file_id, {"status": "processing"})
             
-            # Start transcription
+            # Start transcription, reusing the result for identical audio if
+            # this model and decoding config have already seen it
             start_time = time.time()
-            asr_model = self._get_asr_model()
-            result = asr_model.transcribe(media_file.file_path)
+            result = None
+            if settings.TRANSCRIPT_CACHE_ENABLED:
+                with timed_stage("cache_lookup"):
+                    result = transcript_cache.get(db, media_file.content_hash)
+            cached = result is not None
+            if not cached:
+                # Decode once per media file; retries memory-map the cached copy
+                file_path = media_local_path(media_file)
+                decoded_path = None
+                if settings.AUDIO_CACHE_ENABLED:
+                    with timed_stage("audio_cache"):
+                        decoded_path = audio_cache.ensure(media_file.id, file_path)
+                asr_model = self._get_asr_model()
+                if profiling.is_active():
+                    # Profile in this thread rather than in a pool worker process
+                    asr_model = getattr(asr_model, "asr_model", asr_model)
+                with timed_stage("asr"):
+                    result = asr_model.transcribe(
+                        file_path,
+                        progress_callback=progress_callback,
+                        decoded_path=decoded_path
+                    )
+                if settings.TRANSCRIPT_CACHE_ENABLED:
+                    transcript_cache.put(db, media_file.content_hash, result)
             processing_time = time.time() - start_time
+
+            # Only fresh runs with VAD enabled know how much audio was skipped
+            vad_skipped_fraction = result.get("vad", {}).get("skipped_fraction")
+            if vad_skipped_fraction is not None:
+                VAD_SKIPPED_FRACTION.observe(vad_skipped_fraction)
             
             # Save transcription to database
             transcript_data = TranscriptCreate(
@@ -49,29 +102,43 @@ class TranscriptionService:
                 content=result["text"],
                 language_code=result["language"],
                 confidence_score=self._calculate_average_confidence(result["segments"]),
-                processing_time=processing_time
+                processing_time=processing_time,
+                max_segment_duration=max(
+                    (seg["end"] - seg["start"] for seg in result["segments"]), default=0.0
+                ),
+                vad_skipped_fraction=vad_skipped_fraction
             )
             
-            transcript = transcript_crud.create_transcript(db, transcript_data)
+            with timed_stage("db_write"):
+                transcript = transcript_crud.create_transcript_with_segments(
+                    db, transcript_data, result["segments"]
+                )
             
             # Update media file status
             media_crud.update_media_file(db, media_file_id, {"status": "completed"})
+            transcription_outcomes["cached" if cached else "completed"].inc()
             
             return {
                 "transcript_id": transcript.id,
                 "segments": result["segments"],
                 "processing_time": processing_time,
+                "cached": cached,
+                "vad_skipped_fraction": vad_skipped_fraction,
                 "success": True
             }
             
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
+            transcription_outcomes["failed"].inc()
             # Update status to failed
             try:
                 media_crud.update_media_file(db, media_file_id, {"status": "failed"})
             except:
                 pass
             raise
+        finally:
+            TRANSCRIPTIONS_IN_FLIGHT.dec()
+            observe_stage("total", time.perf_counter() - started)
 
     def _calculate_average_confidence(self, segments: list) -> float:
         """Calculate average confidence from segments"""
@@ -0,0 +1,150 @@
+import numpy as np
+from typing import Iterable, Iterator, Tuple
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """(start, end) index pairs of the True runs in a boolean array"""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return np.column_stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)])
+
+
+class VoiceActivityDetector:
+    """
+    Energy and spectral-flatness VAD over fixed frames.
+
+    A frame counts as speech when it is loud enough relative to the file's
+    peak and its spectrum is not flat (flat spectra are noise/hiss). Short
+    gaps are bridged, very short bursts dropped and every region padded so
+    words are not clipped at the edges. Frame statistics are computed with
+    array operations per decoded block, so analysis can ride along with the
+    single measuring pass over the file.
+    """
+
+    def __init__(
+        self,
+        sr: int = 16000,
+        frame_ms: float = 30.0,
+        energy_threshold_db: float = settings.VAD_ENERGY_THRESHOLD_DB,
+        flatness_threshold: float = settings.VAD_FLATNESS_THRESHOLD,
+        min_speech_ms: float = settings.VAD_MIN_SPEECH_MS,
+        min_silence_ms: float = settings.VAD_MIN_SILENCE_MS,
+        padding_ms: float = settings.VAD_PADDING_MS,
+    ):
+        self.sr = sr
+        self.frame_length = int(sr * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        self.flatness_threshold = flatness_threshold
+        self.min_speech_frames = max(1, int(round(min_speech_ms / frame_ms)))
+        self.min_silence_frames = max(1, int(round(min_silence_ms / frame_ms)))
+        self.padding = int(sr * padding_ms / 1000)
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+
+    def _frame_stats(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame energy (dB) and spectral flatness for an (n, frame_length) array"""
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, flatness
+
+    def analyse(self, blocks: Iterable[np.ndarray]) -> Tuple[np.ndarray, float, float]:
+        """
+        Consume a block stream and return (regions, duration, peak).
+
+        regions is an (n, 2) array of [start, end) sample offsets of speech.
+        Duration and peak are measured in the same pass; the peak is the
+        reference for energy_threshold_db.
+        """
+        energies, flatnesses = [], []
+        remainder = np.zeros(0, dtype=np.float32)
+        num_samples = 0
+        peak = 0.0
+
+        for block in blocks:
+            num_samples += len(block)
+            if len(block):
+                peak = max(peak, float(np.max(np.abs(block))))
+            buffer = np.concatenate([remainder, block])
+            num_frames = len(buffer) // self.frame_length
+            if num_frames:
+                frames = buffer[:num_frames * self.frame_length].reshape(num_frames, self.frame_length)
+                energy_db, flatness = self._frame_stats(frames)
+                energies.append(energy_db)
+                flatnesses.append(flatness)
+            remainder = buffer[num_frames * self.frame_length:]
+
+        duration = num_samples / self.sr
+        if not energies or peak <= 0:
+            return np.zeros((0, 2), dtype=np.int64), duration, peak
+
+        energy_db = np.concatenate(energies) - 20 * np.log10(peak)
+        flatness = np.concatenate(flatnesses)
+        speech = (energy_db > self.energy_threshold_db) & (flatness < self.flatness_threshold)
+        return self._regions(speech, num_samples), duration, peak
+
+    def _regions(self, speech: np.ndarray, num_samples: int) -> np.ndarray:
+        # Bridge short silences inside speech
+        silences = _runs(~speech)
+        inner = (silences[:, 0] > 0) & (silences[:, 1] < len(speech))
+        short = silences[inner & (silences[:, 1] - silences[:, 0] < self.min_silence_frames)]
+        fill = np.zeros(len(speech) + 1, dtype=np.int64)
+        np.add.at(fill, short[:, 0], 1)
+        np.add.at(fill, short[:, 1], -1)
+        speech = speech | (np.cumsum(fill)[:-1] > 0)
+
+        # Drop isolated bursts, then pad and merge what overlaps
+        runs = _runs(speech)
+        runs = runs[runs[:, 1] - runs[:, 0] >= self.min_speech_frames]
+        if len(runs) == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+
+        regions = runs * self.frame_length
+        regions[:, 0] = np.maximum(regions[:, 0] - self.padding, 0)
+        regions[:, 1] = np.minimum(regions[:, 1] + self.padding, num_samples)
+        overlaps = np.r_[False, regions[1:, 0] <= regions[:-1, 1]]
+        group = np.cumsum(~overlaps) - 1
+        merged = np.zeros((group[-1] + 1, 2), dtype=np.int64)
+        merged[:, 0] = regions[~overlaps, 0]
+        np.maximum.at(merged[:, 1], group, regions[:, 1])
+        return merged
+
+
+def keep_regions(blocks: Iterable[np.ndarray], regions: np.ndarray) -> Iterator[np.ndarray]:
+    """Yield only the parts of a block stream that fall inside `regions`"""
+    position = 0
+    index = 0
+    for block in blocks:
+        block_end = position + len(block)
+        while index < len(regions) and regions[index, 0] < block_end:
+            start = max(regions[index, 0], position)
+            end = min(regions[index, 1], block_end)
+            if end > start:
+                yield block[start - position:end - position]
+            if regions[index, 1] > block_end:
+                break
+            index += 1
+        position = block_end
+        if index >= len(regions):
+            break
+
+
+class TimeMap:
+    """Maps times on the speech-only timeline back to original media time"""
+
+    def __init__(self, regions: np.ndarray, sr: int = 16000):
+        self.regions = regions
+        self.sr = sr
+        lengths = regions[:, 1] - regions[:, 0]
+        self.compact_starts = np.r_[0, np.cumsum(lengths)[:-1]] if len(regions) else np.zeros(0)
+        self.speech_samples = int(lengths.sum())
+
+    def __call__(self, times: np.ndarray) -> np.ndarray:
+        if len(self.regions) == 0:
+            return np.asarray(times, dtype=np.float64)
+        samples = np.asarray(times, dtype=np.float64) * self.sr
+        k = np.clip(np.searchsorted(self.compact_starts, samples, side="right") - 1, 0, len(self.regions) - 1)
+        return (self.regions[k, 0] + (samples - self.compact_starts[k])) / self.sr
@@ -0,0 +1,106 @@
+import gc
+import itertools
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Set in the parent before forking; children inherit it copy-on-write
+_shared_asr = None
+_progress_queue = None
+
+
+def _init_worker(num_threads: int):
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    # The scheduler thread does not survive fork and each worker only runs
+    # one transcription at a time, so windows go straight to the model
+    _shared_asr.batcher = None
+
+
+def _run_transcription(task_id: int, audio_path: str, decoded_path: Optional[str]) -> Dict:
+    def report(fraction: float):
+        _progress_queue.put((task_id, fraction))
+
+    return _shared_asr.transcribe(audio_path, progress_callback=report, decoded_path=decoded_path)
+
+
+class ASRWorkerPool:
+    """
+    Serve transcriptions from several processes sharing one copy of the
+    model weights.
+
+    The model is loaded once in the parent, then worker processes are forked.
+    Tensor storage lives outside the Python object headers that refcounting
+    touches, so the weights stay shared copy-on-write instead of every worker
+    holding its own ~1.2 GB copy. Each worker gets `threads_per_worker` torch
+    intra-op threads so the pool does not oversubscribe the cores.
+
+    Exposes the same transcribe() signature as SomaliASR.
+    """
+
+    def __init__(self, asr_model, processes: int, threads_per_worker: Optional[int] = None):
+        global _shared_asr, _progress_queue
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ASR worker pool requires the fork start method")
+
+        self.asr_model = asr_model
+        self.model_name = asr_model.model_name
+        self.processes = processes
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // processes)
+
+        context = multiprocessing.get_context("fork")
+        _shared_asr = asr_model
+        _progress_queue = context.SimpleQueue()
+        self._progress_queue = _progress_queue
+
+        # Move everything allocated so far out of the collector's reach so
+        # collections in the children don't dirty the shared pages
+        gc.collect()
+        gc.freeze()
+        self._pool = context.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+        gc.unfreeze()
+
+        self._task_ids = itertools.count()
+        self._callbacks: Dict[int, Callable[[float], None]] = {}
+        self._listener = threading.Thread(target=self._dispatch_progress, name="asr-pool-progress", daemon=True)
+        self._listener.start()
+        logger.info(f"ASR worker pool started: {processes} processes x {self.threads_per_worker} threads")
+
+    def _dispatch_progress(self):
+        while True:
+            task_id, fraction = self._progress_queue.get()
+            callback = self._callbacks.get(task_id)
+            if callback is not None:
+                try:
+                    callback(fraction)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+
+    def transcribe(self, audio_path: str, progress_callback: Optional[Callable[[float], None]] = None,
+                   decoded_path: Optional[str] = None) -> Dict:
+        task_id = next(self._task_ids)
+        if progress_callback is not None:
+            self._callbacks[task_id] = progress_callback
+        try:
+            return self._pool.apply(_run_transcription, (task_id, audio_path, decoded_path))
+        finally:
+            self._callbacks.pop(task_id, None)
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
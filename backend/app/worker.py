@@ -0,0 +1,19 @@
+from celery import Celery
+from app.core.config import settings
+
+# Run with: celery -A app.worker worker --loglevel=info
+celery_app = Celery("somali_subtitles", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+celery_app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,  # transcriptions are long; don't hoard them
+)
+
+@celery_app.task(name="transcription.run_job")
+def transcribe_job(job_id: str):
+    from app.services.jobs import get_job_manager
+    get_job_manager().run_job(job_id)
+
+@celery_app.task(name="transcription.run_batch_job")
+def transcribe_batch_job(job_id: str):
+    from app.services.jobs import get_job_manager
+    get_job_manager().run_batch_job(job_id)
@@ -0,0 +1,305 @@
+"""
+Offline ASR benchmark.
+
+Times every stage of the transcription pipeline on synthetic audio of
+configurable durations plus real recordings, and writes the results as JSON:
+
+    python benchmark.py --durations 10 60 300 --output bench.json
+    python benchmark.py --baseline bench.json --max-regression 0.15
+
+Stages are timed in isolation (decode/resample, reading the cached decode,
+feature extraction, forward pass, CTC decode with the configured ASR_DECODER,
+segment building, DB write), followed by end-to-end runs of SomaliASR.transcribe and
+TranscriptionService.transcribe_media.
+Each timing is the median of --repeats runs and is also reported as a
+real-time factor (seconds of compute per second of audio). Transcript and
+decoded-audio caches are disabled and the database is a throwaway SQLite
+file, so every repetition does the full work.
+
+Results are keyed by case and stage name so two files from different commits
+can be compared; with --baseline the run exits non-zero when any stage's RTF
+regressed by more than --max-regression.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+DEFAULT_RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Recording.wav")
+
+
+def synthesize(path: str, duration: float, sample_rate: int, seed: int = 0):
+    """
+    Write deterministic speech-like audio: stereo harmonic bursts with a
+    syllable-rate envelope, pauses and background noise, at a non-16 kHz
+    rate so decoding also exercises resampling and downmixing
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    pitch = 120 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.25 * t) > -0.5)
+    audio = 0.3 * voice * envelope + 0.01 * rng.standard_normal(len(t))
+    sf.write(path, np.stack([audio, audio * 0.9], axis=1).astype(np.float32), sample_rate)
+
+
+def reset_peak_rss() -> bool:
+    """
+    Restart the kernel's resident set high-water mark (VmHWM) so the next
+    peak_rss_mb() covers only what ran since. Linux only; False elsewhere,
+    in which case the peak stays process-wide.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of the resident set size since the last reset_peak_rss()"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn, repeats: int):
+    """(median seconds, min seconds, last result) over `repeats` calls"""
+    durations = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), min(durations), result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def benchmark_case(asr, service, db_session, audio_path: str, repeats: int, workdir: str) -> dict:
+    import torch
+    from app.services.audio import stream_audio
+    from app.crud import segment as segment_crud, transcript as transcript_crud
+    from app.models import MediaFile
+    from app.schemas.transcript import TranscriptCreate
+
+    stages = {}
+    per_case_peak = reset_peak_rss()
+
+    def record(name, fn):
+        median, best, result = timed(fn, repeats)
+        stages[name] = {"median_s": round(median, 6), "min_s": round(best, 6)}
+        return result
+
+    # Decode and resample to 16 kHz mono
+    audio = record("decode_resample", lambda: np.concatenate(list(stream_audio(audio_path, sr=16000)) or [np.zeros(0, np.float32)]))
+    duration = len(audio) / 16000
+    decoded_path = os.path.join(workdir, "decoded.f32")
+    audio.astype(np.float32).tofile(decoded_path)
+
+    # Blocks as the model reads them, from the memory-mapped decode
+    blocks = record("read_decoded", lambda: list(asr.preprocess_audio(audio_path, decoded_path=decoded_path)))
+    windows = list(asr._iter_windows(blocks))
+
+    def extract():
+        return [
+            asr.processor(window, sampling_rate=16000, return_tensors="pt", padding="longest").input_values.to(asr.device)
+            for window, _, _ in windows
+        ]
+    features = record("feature_extraction", extract)
+
+    logits = record("forward", lambda: [asr.backend(values)[0] for values in features])
+
+    def ctc_decode():
+        ids, confidences, log_probs = [], [], []
+        for window_logits, (window, left, right) in zip(logits, windows):
+            drop_left = int(round(left / asr.frame_stride))
+            keep = int(round((len(window) - left - right) / asr.frame_stride))
+            window_log_probs = torch.log_softmax(window_logits[drop_left:drop_left + keep].float(), dim=-1)
+            best_log_probs, best = window_log_probs.max(dim=-1)
+            ids.append(best.cpu().numpy())
+            confidences.append(best_log_probs.exp().cpu().numpy())
+            log_probs.append(window_log_probs.cpu().numpy())
+        ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+        confidences = np.concatenate(confidences) if confidences else np.zeros(0, dtype=np.float32)
+        if asr.beam_decoder is not None and log_probs:
+            ids, confidences = asr.beam_decoder.decode(np.concatenate(log_probs))
+        return ids, confidences, asr.processor.batch_decode([ids])[0]
+    ids, confidences, text = record("ctc_decode", ctc_decode)
+
+    segments = record("segment_building", lambda: asr._create_segments(ids, confidences))
+
+    media_file = MediaFile(user_id=None, filename=os.path.basename(audio_path), file_path=audio_path,
+                           file_size=os.path.getsize(audio_path), mime_type="audio/wav", status="uploaded")
+    db_session.add(media_file)
+    db_session.commit()
+
+    def db_write():
+        transcript = transcript_crud.create_transcript(db_session, TranscriptCreate(
+            media_file_id=media_file.id, content=text, confidence_score=0.0, processing_time=0.0
+        ))
+        segment_crud.bulk_create_segments(db_session, transcript.id, segments)
+    record("db_write", db_write)
+
+    record("asr_transcribe", lambda: asr.transcribe(audio_path))
+    record("service_transcribe", lambda: service.transcribe_media(db_session, media_file.id, media_file.user_id))
+
+    for stage in stages.values():
+        stage["rtf"] = round(stage["median_s"] / duration, 6) if duration > 0 else None
+    end_to_end = stages["service_transcribe"]["median_s"]
+    return {
+        "audio": os.path.basename(audio_path),
+        "audio_seconds": round(duration, 3),
+        "windows": len(windows),
+        "words": len(segments),
+        "stages": stages,
+        "throughput_audio_s_per_s": round(duration / end_to_end, 3) if end_to_end > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_scope": "case" if per_case_peak else "process",
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Stages whose RTF grew by more than max_regression relative to the baseline"""
+    regressions = []
+    for case, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(case)
+        if previous is None:
+            continue
+        for stage, timing in current["stages"].items():
+            before = previous["stages"].get(stage, {}).get("rtf")
+            after = timing.get("rtf")
+            if before and after and after > before * (1 + max_regression):
+                regressions.append(f"{case}/{stage}: rtf {before:.4f} -> {after:.4f} (+{after / before - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage ASR pipeline benchmark")
+    parser.add_argument("--durations", type=float, nargs="*", default=[10.0, 60.0],
+                        help="seconds of synthetic audio per case")
+    parser.add_argument("--sample-rate", type=int, default=44100, help="synthetic audio sample rate")
+    parser.add_argument("--audio", nargs="*", default=[DEFAULT_RECORDING], help="real recordings to include")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--model", help="override ASR_MODEL_NAME")
+    parser.add_argument("--backend", help="override ASR_BACKEND")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON output to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="allowed relative RTF increase per stage before failing")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="asr-bench-")
+    # Settings are read at import time, so isolate the run before importing the app
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["TRANSCRIPT_CACHE_ENABLED"] = "false"
+    os.environ["AUDIO_CACHE_ENABLED"] = "false"
+    os.environ["AUDIO_CACHE_DIR"] = os.path.join(workdir, "audio_cache")
+    if args.model:
+        os.environ["ASR_MODEL_NAME"] = args.model
+    if args.backend:
+        os.environ["ASR_BACKEND"] = args.backend
+
+    import torch
+    import transformers
+    from app.core.config import settings
+    from app.db.database import SessionLocal, engine
+    from app.models import Base
+    from app.services.asr import SomaliASR
+    from app.services.transcription import TranscriptionService
+    from app.services.transcript_cache import config_key, model_key
+
+    Base.metadata.create_all(bind=engine)
+    asr = SomaliASR()
+    service = TranscriptionService()
+    service.asr_model = asr
+    db = SessionLocal()
+
+    inputs = []
+    for duration in args.durations:
+        path = os.path.join(workdir, f"synthetic_{duration:g}s.wav")
+        synthesize(path, duration, args.sample_rate)
+        inputs.append((f"synthetic_{duration:g}s", path))
+    for path in args.audio:
+        if os.path.exists(path):
+            inputs.append((os.path.basename(path), path))
+        else:
+            print(f"skipping missing recording {path}", file=sys.stderr)
+
+    # Warm up allocators, kernels and lazy initialisation outside the timings
+    warmup = os.path.join(workdir, "warmup.wav")
+    synthesize(warmup, 2.0, args.sample_rate)
+    asr.transcribe(warmup)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+        },
+        "config": {
+            "model": model_key(),
+            "decoding": config_key(),
+            "decoder": settings.ASR_DECODER,
+            "batching": settings.ASR_BATCHING,
+            "vad": settings.VAD_ENABLED,
+            "repeats": args.repeats,
+        },
+        "cases": {},
+    }
+    try:
+        for name, path in inputs:
+            print(f"benchmarking {name}", file=sys.stderr)
+            results["cases"][name] = benchmark_case(asr, service, db, path, args.repeats, workdir)
+    finally:
+        db.close()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
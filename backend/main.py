@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, media, transcription
+from fastapi.responses import JSONResponse, Response
+from app.routers import admin, auth, media, transcription, streaming
+from app.services.executor import ExecutorSaturated
+from app.services.metrics import CONTENT_TYPE_LATEST, HTTPMetricsMiddleware, render_metrics
+from app.core.config import settings
 import logging
 
 # Configure logging
@@ -22,10 +26,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request latency for /metrics
+app.add_middleware(HTTPMetricsMiddleware)
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    logger.warning(f"Rejecting {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(media.router)
 app.include_router(transcription.router)
+app.include_router(streaming.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+def load_worker_pool():
+    # Fork the ASR workers before any request threads exist
+    if settings.ASR_WORKER_PROCESSES > 0:
+        from app.services.asr import get_asr_model
+        get_asr_model()
+
+@app.on_event("startup")
+def invalidate_transcript_cache():
+    # Drop cached transcripts produced by a previously configured model
+    if settings.TRANSCRIPT_CACHE_ENABLED:
+        from app.db.database import SessionLocal
+        from app.services.transcript_cache import transcript_cache
+        db = SessionLocal()
+        try:
+            transcript_cache.invalidate_stale(db)
+        except Exception as e:
+            logger.warning(f"Could not invalidate transcript cache: {e}")
+        finally:
+            db.close()
 
 @app.get("/")
 async def root():
@@ -35,6 +74,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.security import create_access_token
+from app.db.database import get_db
+from app.models import Base, MediaFile, User
+from app.services.auth_cache import principal_cache
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory database with every table created"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="faadumo", email="faadumo@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def media_file(db, user):
+    media_file = MediaFile(user_id=user.id, filename="clip.wav", file_size=4, status="uploaded")
+    db.add(media_file)
+    db.commit()
+    return media_file
+
+
+@pytest.fixture
+def client(db):
+    """The API served from the test database"""
+    from main import app
+
+    app.dependency_overrides[get_db] = lambda: db
+    principal_cache.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        principal_cache.clear()
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
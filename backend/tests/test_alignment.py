@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.services.alignment import align_words
+
+TOKENS = ["<pad>", "|", "s", "o", "m"]
+BLANK_ID = 0
+DELIMITER_ID = 1
+FRAME_DURATION = 0.02
+
+
+def test_words_span_their_character_frames():
+    #           s  s  _  o  |  |  _  m  _  m  o  _
+    path = [2, 2, 0, 3, 1, 1, 0, 4, 0, 4, 3, 0]
+    confidences = [0.9, 0.7, 1.0, 0.8, 1.0, 1.0, 1.0, 0.6, 1.0, 0.4, 0.5, 1.0]
+
+    words = align_words(np.array(path), np.array(confidences), TOKENS, BLANK_ID, DELIMITER_ID, FRAME_DURATION)
+
+    assert [w["text"] for w in words] == ["so", "mmo"]
+    assert (words[0]["start"], words[0]["end"]) == (0.0, 0.08)
+    assert (words[1]["start"], words[1]["end"]) == (0.14, 0.22)
+    # Mean posterior over character frames only; blanks inside a word don't count
+    assert words[0]["confidence"] == round((0.9 + 0.7 + 0.8) / 3, 4)
+    assert words[1]["confidence"] == round((0.6 + 0.4 + 0.5) / 3, 4)
+
+
+def test_no_characters_no_words():
+    assert align_words(np.array([0, 1, 0]), np.ones(3), TOKENS, BLANK_ID, DELIMITER_ID, FRAME_DURATION) == []
+    assert align_words(np.zeros(0, dtype=np.int64), np.zeros(0), TOKENS, BLANK_ID, DELIMITER_ID, FRAME_DURATION) == []
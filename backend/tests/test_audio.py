@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.services.audio import BLOCK_FRAMES, TARGET_SAMPLE_RATE, decode_range, stream_audio
+
+
+@pytest.fixture
+def wav_path(tmp_path):
+    # A few blocks long, so ranges can start and end inside different blocks
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, 3 * BLOCK_FRAMES + 1234).astype(np.float32)
+    path = tmp_path / "clip.wav"
+    sf.write(path, audio, TARGET_SAMPLE_RATE, subtype="FLOAT")
+    return str(path)
+
+
+@pytest.mark.parametrize("start,end", [(0.0, 1.0), (3.9, 4.2), (5.5, 60.0), (30.0, 40.0)])
+def test_decode_range_matches_a_slice_of_the_full_decode(wav_path, start, end):
+    full = np.concatenate(list(stream_audio(wav_path)))
+
+    audio = decode_range(wav_path, start, end)
+
+    expected = full[int(start * TARGET_SAMPLE_RATE):int(end * TARGET_SAMPLE_RATE)]
+    np.testing.assert_array_equal(audio, expected)
+    assert audio.dtype == np.float32
@@ -0,0 +1,69 @@
+import time
+
+from app.core.security import create_access_token
+from app.models import User as UserModel
+from app.models import UserRole
+from app.schemas.user import User
+from app.services.auth_cache import PrincipalCache, principal_cache
+
+
+def principal(user_id: int) -> User:
+    return User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", is_active=True)
+
+
+def test_entries_never_outlive_their_token():
+    cache = PrincipalCache(max_entries=10, ttl=300)
+    cache.put("fresh", principal(1), time.time() + 60)
+    cache.put("expired", principal(2), time.time() - 1)
+
+    assert cache.get("fresh").id == 1
+    assert cache.get("expired") is None
+
+
+def test_least_recently_used_entry_is_dropped():
+    cache = PrincipalCache(max_entries=2, ttl=300)
+    cache.put("a", principal(1))
+    cache.put("b", principal(2))
+    cache.get("a")
+
+    cache.put("c", principal(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_zero_ttl_disables_caching():
+    cache = PrincipalCache(max_entries=10, ttl=0)
+    cache.put("a", principal(1))
+    assert cache.get("a") is None
+
+
+def test_invalidate_user_drops_all_of_their_tokens():
+    cache = PrincipalCache(max_entries=10, ttl=300)
+    cache.put("phone", principal(1))
+    cache.put("laptop", principal(1))
+    cache.put("other", principal(2))
+
+    assert cache.invalidate_user(1) == 2
+    assert cache.get("phone") is None and cache.get("laptop") is None
+    assert cache.get("other") is not None
+
+
+def test_deactivated_user_is_locked_out_at_once(client, auth_headers, db, user):
+    admin = UserModel(username="admin", email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    admin_headers = {"Authorization": f"Bearer {create_access_token({'sub': admin.email})}"}
+
+    # Served once from the database, which caches the principal
+    assert client.get("/auth/users/me", headers=auth_headers).status_code == 200
+    token = auth_headers["Authorization"].removeprefix("Bearer ")
+    assert principal_cache.get(token) is not None
+
+    response = client.put(f"/auth/users/{user.id}/active?is_active=false", headers=admin_headers)
+    assert response.status_code == 200
+
+    assert principal_cache.get(token) is None
+    response = client.get("/auth/users/me", headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app.services.ctc_decoder import BeamSearchDecoder
+from app.services.language_model import NgramLanguageModel
+
+TOKENS = ["<pad>", "|", "a", "b", "d", "s", "o"]
+BLANK_ID = 0
+DELIMITER_ID = 1
+
+ARPA = """\\data\\
+ngram 1=6
+ngram 2=3
+
+\\1-grams:
+-1.0\t<s>\t-0.3
+-1.2\t</s>
+-2.0\t<unk>
+-0.7\tso\t-0.2
+-0.9\tbad\t-0.2
+-1.5\tdab\t-0.2
+
+\\2-grams:
+-0.2\t<s> so
+-0.4\tso bad
+-0.3\tbad </s>
+
+\\end\\
+"""
+
+
+def peaked_log_probs(num_frames: int, seed: int) -> np.ndarray:
+    """Posteriors where each frame's most likely token is clearly ahead"""
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(0.0, 1.0, (num_frames, len(TOKENS)))
+    best = np.where(rng.random(num_frames) < 0.5, BLANK_ID, rng.integers(1, len(TOKENS), num_frames))
+    logits[np.arange(num_frames), best] += 6.0
+    return logits - np.logaddexp.reduce(logits, axis=1, keepdims=True)
+
+
+def collapse(path: np.ndarray) -> list:
+    """Labels of a CTC frame path: merge repeats, then drop blanks"""
+    merged = [token for i, token in enumerate(path) if i == 0 or token != path[i - 1]]
+    return [token for token in merged if token != BLANK_ID]
+
+
+@pytest.fixture
+def language_model(tmp_path):
+    path = tmp_path / "tiny.arpa"
+    path.write_text(ARPA, encoding="utf-8")
+    return NgramLanguageModel.from_arpa(str(path))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("with_lm", [False, True])
+def test_zero_weight_beam_search_matches_greedy(language_model, seed, with_lm):
+    log_probs = peaked_log_probs(200, seed)
+    decoder = BeamSearchDecoder(
+        TOKENS, BLANK_ID, DELIMITER_ID,
+        lm=language_model if with_lm else None, alpha=0.0, beta=0.0,
+    )
+
+    path, confidences = decoder.decode(log_probs)
+
+    greedy = log_probs.argmax(axis=1)
+    assert collapse(path) == collapse(greedy)
+    np.testing.assert_array_equal(path, greedy)
+    np.testing.assert_allclose(confidences, np.exp(log_probs.max(axis=1)), rtol=1e-5)
+
+
+def test_language_model_picks_the_likelier_word(language_model):
+    # Frames 0 and 2 are a coin toss between b and d, so bad, dab, bab and
+    # dad score the same acoustically; only the LM tells them apart
+    log_probs = np.full((5, len(TOKENS)), -20.0)
+    log_probs[[0, 0, 2, 2], [3, 4, 3, 4]] = np.log(0.5)
+    log_probs[1, 2] = 0.0
+    log_probs[3, BLANK_ID] = 0.0
+    log_probs[4, DELIMITER_ID] = 0.0
+
+    decoder = BeamSearchDecoder(TOKENS, BLANK_ID, DELIMITER_ID, lm=language_model, alpha=1.0, beta=0.0)
+    path, _ = decoder.decode(log_probs)
+
+    assert "".join(TOKENS[t] for t in collapse(path)) == "bad|"
+
+
+def test_empty_input():
+    path, confidences = BeamSearchDecoder(TOKENS, BLANK_ID, DELIMITER_ID).decode(np.zeros((0, len(TOKENS))))
+    assert len(path) == 0 and len(confidences) == 0
+
+
+def test_arpa_backoff(language_model):
+    start = language_model.begin_state()
+    log_prob, state = language_model.score(start, "so")
+    assert log_prob == pytest.approx(-0.2)
+    # "so dab" is not a bigram: back off through so's weight to the unigram
+    log_prob, _ = language_model.score(state, "dab")
+    assert log_prob == pytest.approx(-0.2 + -1.5)
+    log_prob, _ = language_model.score(start, "unseen")
+    assert log_prob == pytest.approx(-0.3 + -2.0)
@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from app.services.executor import BoundedExecutor, ExecutorSaturated, io_executor
+
+
+def test_work_beyond_workers_and_queue_is_rejected():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1, retry_after=3)
+    release = threading.Event()
+    running = [executor.submit(release.wait), executor.submit(release.wait)]
+
+    with pytest.raises(ExecutorSaturated) as excinfo:
+        executor.submit(release.wait)
+    assert excinfo.value.retry_after == 3
+    assert executor.pending == 2
+    assert executor.queue_depth == 1
+
+    release.set()
+    for future in running:
+        future.result(timeout=5)
+    executor.submit(lambda: None).result(timeout=5)
+    assert executor.pending == 0
+
+
+def test_saturation_is_a_503_with_retry_after(client, auth_headers, monkeypatch):
+    def saturated(fn, *args, **kwargs):
+        raise ExecutorSaturated("io", 7)
+
+    monkeypatch.setattr(io_executor, "submit", saturated)
+
+    response = client.get("/media/history", headers=auth_headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
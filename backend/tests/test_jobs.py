@@ -0,0 +1,79 @@
+import pytest
+
+from app.db import database
+from app.services import jobs as jobs_module
+from app.services import transcription
+from app.services.executor import ExecutorSaturated
+from app.services.jobs import InMemoryJobStore, JobManager, JobStatus
+
+
+@pytest.fixture
+def manager(db, monkeypatch):
+    # Jobs open their own session; hand them the test database instead
+    monkeypatch.setattr(database, "SessionLocal", lambda: db)
+    return JobManager(backend="local")
+
+
+def fake_transcribe(progress):
+    def transcribe_media(db, media_file_id, user_id, progress_callback=None):
+        for fraction in progress:
+            progress_callback(fraction)
+        return {"transcript_id": 7, "processing_time": 1.5}
+    return transcribe_media
+
+
+def test_job_reports_progress_and_result(manager, db, media_file, monkeypatch):
+    seen = []
+    monkeypatch.setattr(transcription.transcription_service, "transcribe_media", fake_transcribe([0.25, 0.5]))
+    monkeypatch.setattr(jobs_module.inference_executor, "submit", lambda fn, job_id: seen.append(job_id))
+
+    job = manager.submit(db, media_file, media_file.user_id)
+    db.refresh(media_file)
+    assert media_file.status == JobStatus.QUEUED.value
+    assert manager.store.get(job["job_id"])["status"] == JobStatus.QUEUED.value
+
+    manager.run_job(seen[0])
+
+    finished = manager.store.get(job["job_id"])
+    assert finished["status"] == JobStatus.COMPLETED.value
+    assert finished["progress"] == 100.0
+    assert finished["result"] == {"transcript_id": 7, "processing_time": 1.5}
+
+
+def test_failed_transcription_fails_the_job(manager, db, media_file, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ValueError("decoder exploded")
+
+    monkeypatch.setattr(transcription.transcription_service, "transcribe_media", broken)
+    monkeypatch.setattr(jobs_module.inference_executor, "submit", lambda fn, job_id: None)
+    job = manager.submit(db, media_file, media_file.user_id)
+
+    manager.run_job(job["job_id"])
+
+    failed = manager.store.get(job["job_id"])
+    assert failed["status"] == JobStatus.FAILED.value
+    assert failed["error"] == "decoder exploded"
+
+
+def test_rejected_job_restores_the_media_status(manager, db, media_file, monkeypatch):
+    def saturated(fn, job_id):
+        raise ExecutorSaturated("inference", 5)
+
+    monkeypatch.setattr(jobs_module.inference_executor, "submit", saturated)
+
+    with pytest.raises(ExecutorSaturated):
+        manager.submit(db, media_file, media_file.user_id)
+
+    db.refresh(media_file)
+    assert media_file.status == "uploaded"
+    assert manager.store._jobs == {}
+
+
+def test_finished_jobs_expire():
+    store = InMemoryJobStore(ttl_seconds=60)
+    store.create({"job_id": "old", "updated_at": 0.0})
+
+    store.create({"job_id": "new", "updated_at": 1e12})
+
+    assert store.get("old") is None
+    assert store.get("new") is not None
@@ -0,0 +1,23 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.media import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    media_file = SimpleNamespace(id=42, created_at=datetime(2026, 10, 18, 9, 30, 15, 123456))
+
+    cursor = _encode_cursor(media_file)
+
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == (media_file.created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "MjAyNi0xMC0xOA"])
+def test_malformed_cursor_is_a_client_error(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        _decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,67 @@
+import hashlib
+import os
+
+import pytest
+
+from app.crud.storage import acquire_blob, release_blob
+from app.models import StorageBlob
+from app.services.storage import LocalBlobStore, shard_path
+
+KEY = hashlib.sha256(b"clip").hexdigest()
+
+
+def write_temp(store: LocalBlobStore, data: bytes) -> str:
+    path = store.temp_path()
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_blob_is_deleted_after_the_last_reference(db, tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    assert acquire_blob(db, KEY, 4) == 1
+    store.put(write_temp(store, b"clip"), KEY)
+    assert acquire_blob(db, KEY, 4) == 2
+
+    assert release_blob(db, KEY, store.delete) is False
+    assert store.exists(KEY)
+    assert db.get(StorageBlob, KEY).ref_count == 1
+
+    assert release_blob(db, KEY, store.delete) is True
+    assert not store.exists(KEY)
+    db.expire_all()
+    assert db.get(StorageBlob, KEY) is None
+
+
+def test_failed_delete_keeps_the_reference(db, tmp_path):
+    acquire_blob(db, KEY, 4)
+
+    def broken_delete(key):
+        raise OSError("disk gone")
+
+    with pytest.raises(OSError):
+        release_blob(db, KEY, broken_delete)
+    db.expire_all()
+    assert db.get(StorageBlob, KEY).ref_count == 1
+
+
+def test_put_leaves_an_existing_blob_untouched(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    store.put(write_temp(store, b"clip"), KEY)
+    second = write_temp(store, b"other bytes")
+
+    store.put(second, KEY)
+
+    with open(store.local_path(KEY), "rb") as f:
+        assert f.read() == b"clip"
+    assert not os.path.exists(second)
+
+
+@pytest.mark.parametrize("key", ["../../etc/passwd", KEY.upper(), KEY[:40], ""])
+def test_keys_that_are_not_hashes_are_rejected(key):
+    with pytest.raises(ValueError):
+        shard_path(key)
+
+
+def test_legacy_keys_still_resolve():
+    assert shard_path("ab" * 16).endswith("ab" * 16)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import torch
+
+from app.core.config import settings
+from app.services.streaming import SAMPLE_RATE, StreamingTranscriber, pcm_to_float
+
+FRAME_STRIDE = 320
+CHUNK = 1600  # 0.1s per message
+
+
+class FakeModel:
+    """
+    Every sample holds its absolute index, so frames know where they are in
+    the stream: a word "a" starts every 0.5s, followed by a delimiter only
+    if delimited
+    """
+    frame_stride = FRAME_STRIDE
+    tokens = ["<pad>", "|", "a"]
+    blank_id = 0
+    delimiter_id = 1
+
+    def __init__(self, delimited: bool):
+        self.delimited = delimited
+
+    def _forward(self, audio: np.ndarray) -> torch.Tensor:
+        positions = audio[::FRAME_STRIDE][:len(audio) // FRAME_STRIDE].astype(np.int64) // FRAME_STRIDE
+        logits = torch.full((len(positions), 3), -10.0)
+        logits[:, 0] = 0.0
+        phase = torch.from_numpy(positions % 25)
+        logits[phase < 5, 2] = 5.0
+        if self.delimited:
+            logits[phase == 10, 1] = 5.0
+        return logits
+
+
+def stream(transcriber: StreamingTranscriber, seconds: float, decode_every: int = 1):
+    """Feed the stream in 0.1s messages, decoding only every decode_every-th due step"""
+    finals, longest = [], 0
+    for i in range(int(seconds * SAMPLE_RATE) // CHUNK):
+        transcriber.add_audio(np.arange(i * CHUNK, (i + 1) * CHUNK, dtype=np.float32))
+        longest = max(longest, len(transcriber.audio))
+        if transcriber.due() and i % decode_every == 0:
+            finals += transcriber.process()["final"]
+    finals += transcriber.finish()["final"]
+    return finals, longest
+
+
+@pytest.mark.parametrize("delimited", [True, False])
+@pytest.mark.parametrize("decode_every", [1, 97])
+def test_buffer_stays_bounded(delimited, decode_every):
+    transcriber = StreamingTranscriber(FakeModel(delimited))
+
+    finals, longest = stream(transcriber, 60.0, decode_every)
+
+    assert longest <= settings.STREAM_MAX_BUFFER_S * SAMPLE_RATE
+    starts = [word["start"] for word in finals]
+    assert starts == sorted(set(starts))
+
+
+def test_delimited_words_are_all_finalised_once():
+    finals, _ = stream(StreamingTranscriber(FakeModel(delimited=True)), 20.0)
+
+    assert [word["text"] for word in finals] == ["a"] * 40
+    np.testing.assert_allclose([word["start"] for word in finals], np.arange(40) * 0.5)
+
+
+def test_endless_word_is_forced_final():
+    # Without delimiters everything is one word that never becomes stable,
+    # so the buffer cap has to finalise it piece by piece
+    transcriber = StreamingTranscriber(FakeModel(delimited=False))
+    forced = []
+    for i in range(int(30.0 * SAMPLE_RATE) // CHUNK):
+        transcriber.add_audio(np.arange(i * CHUNK, (i + 1) * CHUNK, dtype=np.float32))
+        # Decoding keeps up, so the cap never has to drop undecoded audio
+        assert transcriber.dropped == 0
+        if transcriber.due():
+            forced += transcriber.process()["final"]
+
+    assert forced
+    assert transcriber.buffer_end - transcriber.committed <= settings.STREAM_MAX_BUFFER_S * SAMPLE_RATE
+
+
+def test_pcm_formats():
+    np.testing.assert_allclose(pcm_to_float(np.array([0, 16384, -32768], "<i2").tobytes(), "s16le"), [0, 0.5, -1])
+    np.testing.assert_array_equal(pcm_to_float(np.array([0.25], "<f4").tobytes(), "f32le"), [0.25])
+    with pytest.raises(ValueError):
+        pcm_to_float(b"", "mulaw")
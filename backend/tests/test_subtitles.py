@@ -0,0 +1,62 @@
+import pytest
+
+from app.crud.transcript import create_transcript_with_segments
+from app.schemas.transcript import TranscriptCreate
+from app.services.subtitles import group_cues, render
+
+WORDS = [
+    {"start": 0.0, "end": 0.4, "text": "waa"},
+    {"start": 0.5, "end": 1.1, "text": "maxay"},
+    {"start": 4.0, "end": 4.3, "text": "tahay"},
+]
+
+
+def transcribe(db, media_file, words=WORDS):
+    transcript = TranscriptCreate(media_file_id=media_file.id, content="", language_code="so")
+    return create_transcript_with_segments(db, transcript, words)
+
+
+def test_cues_break_on_pauses_and_length():
+    words = [(w["start"], w["end"], w["text"]) for w in WORDS]
+
+    assert list(group_cues(words, max_gap=1.0)) == [(0.0, 1.1, "waa maxay"), (4.0, 4.3, "tahay")]
+    assert len(list(group_cues(words, max_chars=8, max_gap=10.0))) == 3
+
+
+def test_srt_and_vtt_timestamps():
+    cues = [(3661.5, 3662.25, "waa")]
+
+    assert b"".join(render(cues, "srt")) == b"1\n01:01:01,500 --> 01:01:02,250\nwaa\n\n"
+    assert b"".join(render(cues, "vtt")) == b"WEBVTT\n\n01:01:01.500 --> 01:01:02.250\nwaa\n\n"
+
+
+@pytest.mark.parametrize("fmt", ["srt", "vtt"])
+def test_unchanged_subtitles_are_not_modified(client, auth_headers, db, media_file, fmt):
+    transcribe(db, media_file)
+    url = f"/transcribe/{media_file.id}/subtitles?format={fmt}"
+
+    first = client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    assert "maxay" in first.text
+    etag = first.headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get(url, headers={**auth_headers, "If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+
+def test_etag_changes_with_format_and_transcript(client, auth_headers, db, media_file):
+    transcribe(db, media_file)
+    url = f"/transcribe/{media_file.id}/subtitles"
+    srt_etag = client.get(url, headers=auth_headers).headers["ETag"]
+    vtt_etag = client.get(f"{url}?format=vtt", headers=auth_headers).headers["ETag"]
+    assert srt_etag != vtt_etag
+
+    # Transcribing again serves the new transcript, not a stale 304
+    transcribe(db, media_file, WORDS[:1])
+    response = client.get(url, headers={**auth_headers, "If-None-Match": srt_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != srt_etag
+    assert "maxay" not in response.text
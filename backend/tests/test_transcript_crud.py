@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.crud.segment import get_segments_in_range
+from app.crud.transcript import create_transcript_with_segments
+from app.models import Transcript, TranscriptSegment
+from app.schemas.transcript import TranscriptCreate
+
+SEGMENTS = [
+    {"start": 0.0, "end": 0.4, "text": "waa", "confidence": 0.9},
+    {"start": 0.5, "end": 1.1, "text": "maxay", "confidence": 0.8},
+    {"start": 1.3, "end": 1.6, "text": "tahay"},
+]
+
+
+def transcript_for(media_file) -> TranscriptCreate:
+    return TranscriptCreate(media_file_id=media_file.id, content="waa maxay tahay", language_code="so")
+
+
+def test_transcript_and_segments_are_written_together(db, media_file):
+    transcript = create_transcript_with_segments(db, transcript_for(media_file), SEGMENTS)
+
+    segments = get_segments_in_range(db, transcript.id, 0.45, 1.2)
+    assert [segment.text for segment in segments] == ["maxay"]
+    assert db.query(TranscriptSegment).filter_by(transcript_id=transcript.id).count() == 3
+
+
+def test_failed_segment_insert_leaves_no_transcript(db, media_file):
+    broken = SEGMENTS[:2] + [{"start": None, "end": 1.6, "text": "tahay"}]
+
+    with pytest.raises(IntegrityError):
+        create_transcript_with_segments(db, transcript_for(media_file), broken)
+
+    assert db.query(Transcript).count() == 0
+    assert db.query(TranscriptSegment).count() == 0
@@ -0,0 +1,99 @@
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from app.core.config import settings
+from app.services import asr as asr_module
+from app.services.alignment import align_words
+from app.services.asr import SomaliASR
+from app.services.vad import TimeMap, VoiceActivityDetector, keep_regions
+
+TOKENS = ["<pad>", "|", "s", "o", "m"]
+BLANK_ID = 0
+DELIMITER_ID = 1
+FRAME_DURATION = 0.02
+
+
+def test_time_map_restores_media_time():
+    # Speech at 1.0-2.0s and 5.0-5.5s of the original audio
+    regions = np.array([[16000, 32000], [80000, 88000]])
+    time_map = TimeMap(regions)
+
+    assert time_map.speech_samples == 24000
+    np.testing.assert_allclose(time_map(np.array([0.0, 0.5, 1.0, 1.25, 1.5])), [1.0, 1.5, 5.0, 5.25, 5.5])
+
+
+def test_keep_regions_matches_slicing():
+    audio = np.arange(100_000, dtype=np.float32)
+    regions = np.array([[10, 500], [65_530, 65_540], [70_000, 99_999]])
+    blocks = np.split(audio, [65_536, 65_537, 90_000])
+
+    kept = np.concatenate(list(keep_regions(blocks, regions)))
+
+    np.testing.assert_array_equal(kept, np.concatenate([audio[start:end] for start, end in regions]))
+
+
+def test_aligned_words_land_in_media_time():
+    regions = np.array([[16000, 32000], [80000, 88000]])
+    # Word boundaries at compact 0.0-0.1s and 1.0-1.1s
+    path = np.zeros(60, dtype=np.int64)
+    path[0:5] = 2
+    path[10] = DELIMITER_ID
+    path[50:55] = 3
+
+    words = align_words(path, np.ones(60), TOKENS, BLANK_ID, DELIMITER_ID, FRAME_DURATION, TimeMap(regions))
+
+    assert [(w["start"], w["end"]) for w in words] == [(1.0, 1.1), (5.0, 5.1)]
+
+
+def burst_in_silence() -> np.ndarray:
+    """One second of a voiced sound between two seconds of near silence"""
+    sr = 16000
+    rng = np.random.default_rng(0)
+    t = np.arange(sr) / sr
+    voiced = 0.3 * sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    audio = np.concatenate([np.zeros(sr), voiced, np.zeros(sr)]).astype(np.float32)
+    return audio + 1e-4 * rng.standard_normal(len(audio)).astype(np.float32)
+
+
+def test_detects_a_voiced_burst_in_silence():
+    sr = 16000
+    audio = burst_in_silence()
+
+    regions, duration, _ = VoiceActivityDetector(padding_ms=0).analyse(np.array_split(audio, 7))
+
+    assert duration == 3.0
+    assert len(regions) == 1
+    start, end = regions[0] / sr
+    assert start == pytest.approx(1.0, abs=0.05)
+    assert end == pytest.approx(2.0, abs=0.05)
+
+
+def test_vad_and_inference_share_one_decode(monkeypatch, tmp_path):
+    audio = burst_in_silence()
+    decodes = []
+
+    def fake_stream_audio(audio_path, sr):
+        decodes.append(audio_path)
+        yield from np.array_split(audio, 7)
+
+    monkeypatch.setattr(settings, "VAD_ENABLED", True)
+    monkeypatch.setattr(asr_module, "stream_audio", fake_stream_audio)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    asr = SomaliASR.__new__(SomaliASR)
+    asr.frame_stride = 320
+    asr.tokens, asr.blank_id, asr.delimiter_id = TOKENS, BLANK_ID, DELIMITER_ID
+    asr.beam_decoder = None
+    asr.batcher = None
+    asr.processor = SimpleNamespace(batch_decode=lambda ids: [""])
+    asr._forward = lambda window: torch.zeros(len(window) // 320, len(TOKENS))
+
+    result = asr.transcribe("clip.wav")
+
+    assert decodes == ["clip.wav"]
+    assert result["vad"]["speech_regions"] == 1
+    # The spooled decode is gone once transcription is done
+    assert list(tmp_path.iterdir()) == []
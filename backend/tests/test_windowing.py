@@ -0,0 +1,85 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+import torch
+
+from app.core.config import settings
+from app.services.asr import SomaliASR
+
+FRAME_STRIDE = 320
+VOCAB_SIZE = 7
+
+
+def fake_forward(window: np.ndarray) -> torch.Tensor:
+    """
+    Stand-in for the model: every sample holds its absolute index, so each
+    output frame knows where it is in the recording and its logits depend
+    only on that, as they would for an ideal model with no edge effects
+    """
+    positions = window[::FRAME_STRIDE][:len(window) // FRAME_STRIDE].astype(np.int64) // FRAME_STRIDE
+    logits = torch.zeros(len(positions), VOCAB_SIZE)
+    logits[torch.arange(len(positions)), torch.from_numpy(positions % VOCAB_SIZE)] = torch.from_numpy(
+        (1 + positions % 5).astype(np.float32)
+    )
+    return logits
+
+
+class ImmediateBatcher:
+    def submit(self, window):
+        future = Future()
+        future.set_result(fake_forward(window))
+        return future
+
+
+def make_asr(batcher=None) -> SomaliASR:
+    asr = SomaliASR.__new__(SomaliASR)
+    asr.frame_stride = FRAME_STRIDE
+    asr.beam_decoder = None
+    asr.batcher = batcher
+    asr._forward = fake_forward
+    return asr
+
+
+def split_blocks(audio: np.ndarray, seed: int):
+    """Cut the audio into irregular blocks, like a decoder would yield"""
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, len(audio)), size=20, replace=False))
+    return np.split(audio, cuts)
+
+
+@pytest.mark.parametrize("chunk_s,stride_s", [(1.0, 0.2), (2.0, 0.5), (0.6, 0.1)])
+@pytest.mark.parametrize("batched", [False, True])
+def test_stitched_windows_match_a_single_pass(monkeypatch, chunk_s, stride_s, batched):
+    monkeypatch.setattr(settings, "ASR_CHUNK_LENGTH_S", chunk_s)
+    monkeypatch.setattr(settings, "ASR_CHUNK_STRIDE_S", stride_s)
+    monkeypatch.setattr(settings, "ASR_BATCH_MAX_SIZE", 3)
+    asr = make_asr(ImmediateBatcher() if batched else None)
+
+    audio = np.arange(165 * FRAME_STRIDE, dtype=np.float32)
+    ids, confidences, log_probs = asr._predict_frames(split_blocks(audio, seed=len(audio)))
+
+    expected_confidences, expected_ids = torch.softmax(fake_forward(audio), dim=-1).max(dim=-1)
+    assert log_probs is None
+    np.testing.assert_array_equal(ids, expected_ids.numpy())
+    np.testing.assert_allclose(confidences, expected_confidences.numpy(), rtol=1e-6)
+
+
+def test_progress_reaches_completion(monkeypatch):
+    monkeypatch.setattr(settings, "ASR_CHUNK_LENGTH_S", 1.0)
+    monkeypatch.setattr(settings, "ASR_CHUNK_STRIDE_S", 0.2)
+    asr = make_asr()
+    audio = np.arange(100 * FRAME_STRIDE, dtype=np.float32)
+
+    progress = []
+    asr._predict_frames([audio], total_samples=len(audio), progress_callback=progress.append)
+
+    assert progress == sorted(progress)
+    assert progress[-1] == 1.0
+
+
+def test_windows_need_room_between_strides(monkeypatch):
+    monkeypatch.setattr(settings, "ASR_CHUNK_LENGTH_S", 1.0)
+    monkeypatch.setattr(settings, "ASR_CHUNK_STRIDE_S", 0.5)
+    with pytest.raises(ValueError):
+        list(make_asr()._iter_windows([np.zeros(16000, dtype=np.float32)]))